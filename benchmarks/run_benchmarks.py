@@ -0,0 +1,172 @@
+"""
+Бенчмарки движков раскроя на синтетических заказах.
+
+Запуск из корня репозитория:
+    python -m benchmarks.run_benchmarks                      # сравнение с базовой линией
+    python -m benchmarks.run_benchmarks --update-baseline    # перезапись базовой линии
+"""
+from typing import List, Dict, Tuple, Callable
+from entity.container import Container
+from entity.figure import Figure
+from service.calc import CalcService
+from service.engines import create_packer
+from service.guillotine_packer import GuillotinePacker
+from service.industrial_calc import IndustrialCalcService
+from service.layout_cache import LayoutCache
+from benchmarks.workloads import generate_workloads
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baselines.json')
+
+def run_guillotine(container: Container, figures: List[Figure]) -> Tuple[int, float]:
+    result = GuillotinePacker(container, figures).pack_single_container()
+    return len(result['placements']), result['efficiency']
+
+def run_guillotine_bulk(container: Container, figures: List[Figure]) -> Tuple[int, float]:
+    result = GuillotinePacker(container, figures, bulk=True).pack_single_container()
+    return len(result['placements']), result['efficiency']
+
+def run_maxrects(container: Container, figures: List[Figure]) -> Tuple[int, float]:
+    result = create_packer('maxrects', container, figures).pack_single_container()
+    return len(result['placements']), result['efficiency']
+
+def run_skyline(container: Container, figures: List[Figure]) -> Tuple[int, float]:
+    result = create_packer('skyline', container, figures).pack_single_container()
+    return len(result['placements']), result['efficiency']
+
+def run_calc(container: Container, figures: List[Figure]) -> Tuple[int, float]:
+    result = CalcService(container, figures).find_optimal_container_packing()
+    return result['total_figures_per_container'], result['efficiency']
+
+def run_industrial(container: Container, figures: List[Figure]) -> Tuple[int, float]:
+    # Собственный кэш на каждый запуск, чтобы измерять расчет, а не попадание в кэш
+    service = IndustrialCalcService(container, figures, cache=LayoutCache(max_entries=1))
+    result = service.calculate_production_plan()
+    return len(result['layout_coordinates']), result['efficiency']
+
+# Движки: функция (контейнер, фигуры) -> (размещено деталей, эффективность)
+ENGINES: Dict[str, Callable[[Container, List[Figure]], Tuple[int, float]]] = {
+    'guillotine': run_guillotine,
+    'guillotine_bulk': run_guillotine_bulk,
+    'maxrects': run_maxrects,
+    'skyline': run_skyline,
+    'calc': run_calc,
+    'industrial': run_industrial,
+}
+
+def measure(engine: Callable, container: Container, figures: List[Figure], repeat: int) -> Dict:
+    """Измеряет лучшее время из repeat запусков, пиковую память и эффективность"""
+    best_seconds = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parts, efficiency = engine(container, figures)
+        best_seconds = min(best_seconds, time.perf_counter() - start)
+
+    # Память меряем отдельным запуском: tracemalloc замедляет выполнение
+    tracemalloc.start()
+    try:
+        engine(container, figures)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'seconds': best_seconds,
+        'parts': parts,
+        'parts_per_second': parts / best_seconds if best_seconds > 0 else 0.0,
+        'peak_memory': peak_memory,
+        'efficiency': efficiency,
+    }
+
+def run_benchmarks(engines: List[str], seed: int, repeat: int) -> Dict[str, Dict]:
+    results = {}
+    for workload_name, container, figures in generate_workloads(seed):
+        for engine_name in engines:
+            results[f"{workload_name}|{engine_name}"] = measure(ENGINES[engine_name], container, figures, repeat)
+    return results
+
+def compare_with_baseline(results: Dict[str, Dict], baseline: Dict[str, Dict],
+                          tolerance: float, efficiency_tolerance: float,
+                          noise_floor: float = 0.0) -> List[str]:
+    """
+    Возвращает список регрессий относительно базовой линии.
+    Замедления меньше noise_floor секунд считаются шумом измерения
+    """
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        if result['seconds'] > reference['seconds'] * (1 + tolerance) + noise_floor:
+            regressions.append(
+                f"{key}: время {result['seconds'] * 1000:.2f} ms > "
+                f"{reference['seconds'] * 1000:.2f} ms (+{tolerance:.0%})"
+            )
+        if result['efficiency'] < reference['efficiency'] - efficiency_tolerance:
+            regressions.append(
+                f"{key}: эффективность {result['efficiency']:.4f} < {reference['efficiency']:.4f}"
+            )
+    return regressions
+
+def print_results(results: Dict[str, Dict], baseline: Dict[str, Dict]):
+    print(f"{'workload|engine':<38} {'ms':>9} {'base ms':>9} {'parts/s':>11} {'peak KiB':>9} {'eff':>7}")
+    for key, result in results.items():
+        reference = baseline.get(key)
+        base_ms = f"{reference['seconds'] * 1000:.2f}" if reference else '-'
+        print(
+            f"{key:<38} {result['seconds'] * 1000:>9.2f} {base_ms:>9} "
+            f"{result['parts_per_second']:>11.0f} {result['peak_memory'] / 1024:>9.0f} "
+            f"{result['efficiency']:>7.4f}"
+        )
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Бенчмарки движков раскроя')
+    parser.add_argument('--engines', nargs='+', choices=list(ENGINES), default=list(ENGINES))
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='допустимое относительное замедление (0.25 = +25%%)')
+    parser.add_argument('--noise-floor', type=float, default=0.5,
+                        help='замедление в миллисекундах, которое считается шумом')
+    parser.add_argument('--efficiency-tolerance', type=float, default=0.001,
+                        help='допустимое абсолютное падение эффективности')
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.engines, args.seed, args.repeat)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    print_results(results, baseline)
+
+    if args.update_baseline:
+        baseline.update({
+            key: {'seconds': result['seconds'], 'efficiency': result['efficiency']}
+            for key, result in results.items()
+        })
+        with open(args.baseline, 'w') as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+        print(f"\nБазовая линия обновлена: {args.baseline}")
+        return 0
+
+    regressions = compare_with_baseline(
+        results, baseline, args.tolerance, args.efficiency_tolerance, args.noise_floor / 1000
+    )
+    if regressions:
+        print("\nРегрессии производительности:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
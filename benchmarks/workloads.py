@@ -0,0 +1,54 @@
+from typing import List, Tuple, Dict, Callable
+from entity.container import Container
+from entity.figure import Figure
+import random
+
+# Стандартные листы: A1 и лист ДСП
+SHEETS = ((594, 841), (1830, 2750))
+
+def few_large_parts(rnd: random.Random, rotation: bool) -> Tuple[Container, List[Figure]]:
+    """Несколько крупных деталей на листе ДСП"""
+    container = Container(*SHEETS[1], margin=10)
+    figures = [
+        Figure(rnd.randint(200, 900), rnd.randint(200, 900), rnd.randint(1, 6), rotation)
+        for _ in range(rnd.randint(3, 6))
+    ]
+    return container, figures
+
+def many_small_parts(rnd: random.Random, rotation: bool) -> Tuple[Container, List[Figure]]:
+    """Тысячи мелких деталей на листе ДСП"""
+    container = Container(*SHEETS[1], margin=5)
+    figures = [
+        Figure(rnd.randint(8, 40), rnd.randint(8, 40), rnd.randint(100, 400), rotation)
+        for _ in range(rnd.randint(15, 25))
+    ]
+    return container, figures
+
+def mixed_margins(rnd: random.Random, rotation: bool) -> Tuple[Container, List[Figure]]:
+    """Детали разных размеров с разными технологическими отступами"""
+    container = Container(*rnd.choice(SHEETS), margin=rnd.randint(0, 10))
+    figures = [
+        Figure(rnd.randint(20, 300), rnd.randint(20, 300), rnd.randint(5, 80), rotation, rnd.randint(0, 5))
+        for _ in range(rnd.randint(5, 12))
+    ]
+    return container, figures
+
+GENERATORS: Dict[str, Callable[[random.Random, bool], Tuple[Container, List[Figure]]]] = {
+    'few_large': few_large_parts,
+    'many_small': many_small_parts,
+    'mixed_margins': mixed_margins,
+}
+
+def generate_workloads(seed: int = 42) -> List[Tuple[str, Container, List[Figure]]]:
+    """
+    Генерирует воспроизводимый набор заказов: каждый генератор
+    с разрешенным и запрещенным поворотом деталей
+    """
+    workloads = []
+    for name, generator in GENERATORS.items():
+        for rotation in (True, False):
+            rnd = random.Random(f"{seed}:{name}:{rotation}")
+            container, figures = generator(rnd, rotation)
+            suffix = 'rotation' if rotation else 'fixed'
+            workloads.append((f"{name}/{suffix}", container, figures))
+    return workloads
@@ -1,23 +1,31 @@
 from dataclasses import dataclass
 from typing import List, Tuple
 
-@dataclass
+@dataclass(slots=True)
 class GuillotineNode:
     x: int
     y: int
     width: int
     height: int
     used: bool = False
+    columns: int = 1  # Размер блока одинаковых фигур, размещенного в узле
+    rows: int = 1
     right: 'GuillotineNode' = None
     down: 'GuillotineNode' = None
 
+@dataclass(frozen=True)
 class Container:
-    def __init__(self, width: int, height: int, margin: int = 0):
-        self.width = width
-        self.height = height
-        self.margin = margin  # Технологические отступы по краям
-        self.area = width * height
-        self.root = GuillotineNode(margin, margin, width - 2*margin, height - 2*margin)
+    """
+    Неизменяемая спецификация листа. Дерево свободного пространства
+    хранится отдельно в PackingSession
+    """
+    width: int
+    height: int
+    margin: int = 0  # Технологические отступы по краям
+    
+    @property
+    def area(self) -> int:
+        return self.width * self.height
     
     def __str__(self) -> str:
         return f"Container({self.width}x{self.height}, margin: {self.margin})"
\ No newline at end of file
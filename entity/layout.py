@@ -0,0 +1,104 @@
+from array import array
+from collections import Counter
+from typing import List, Dict, Iterator, Union
+from entity.figure import Figure
+from entity.part_type import PartType
+
+class Layout:
+    """
+    Компактное представление раскроя листа.
+    Координаты, номера типов фигур и признак поворота хранятся в типизированных массивах,
+    сами фигуры - один раз в таблице типов. Для совместимости размещения доступны
+    как словари {'figure', 'x', 'y', 'rotated'}
+    """
+    __slots__ = ('figures', 'xs', 'ys', 'type_ids', 'rotated', '_type_index')
+
+    def __init__(self):
+        self.figures: List[Figure] = []  # Таблица типов в ориентации размещения
+        self.xs = array('i')
+        self.ys = array('i')
+        self.type_ids = array('i')
+        self.rotated = array('b')
+        self._type_index: Dict[int, int] = {}
+
+    def type_id(self, figure: Figure) -> int:
+        """Возвращает номер типа фигуры, добавляя ее в таблицу при первом размещении"""
+        type_id = self._type_index.get(id(figure))
+        if type_id is None:
+            type_id = len(self.figures)
+            self.figures.append(figure)
+            self._type_index[id(figure)] = type_id
+        return type_id
+
+    def add(self, figure: Figure, x: int, y: int, rotated: bool = False):
+        """Добавляет одно размещение"""
+        self.xs.append(x)
+        self.ys.append(y)
+        self.type_ids.append(self.type_id(figure))
+        self.rotated.append(rotated)
+
+    def add_block(self, figure: Figure, x: int, y: int, columns: int, rows: int, rotated: bool = False):
+        """Добавляет блок columns x rows одинаковых фигур"""
+        fig_width, fig_height = figure.size_with_margin()
+        count = columns * rows
+        self.xs.extend(x + column * fig_width for row in range(rows) for column in range(columns))
+        self.ys.extend(y + row * fig_height for row in range(rows) for column in range(columns))
+        self.type_ids.extend(array('i', [self.type_id(figure)]) * count)
+        self.rotated.extend(array('b', [rotated]) * count)
+
+    def type_counts(self) -> Counter:
+        """Количество размещений каждого типа фигур"""
+        return Counter(self.type_ids)
+
+    def part_counts(self) -> Counter:
+        """Количество размещений каждого вида детали; повернутые учитываются в исходной ориентации"""
+        counts = Counter()
+        for (type_id, rotated), count in Counter(zip(self.type_ids, self.rotated)).items():
+            counts[PartType.of_placed(self.figures[type_id], rotated)] += count
+        return counts
+
+    @property
+    def used_area(self) -> int:
+        return sum(self.figures[type_id].area() * count for type_id, count in self.type_counts().items())
+
+    def copy(self) -> 'Layout':
+        layout = Layout()
+        layout.figures = list(self.figures)
+        layout.xs = array('i', self.xs)
+        layout.ys = array('i', self.ys)
+        layout.type_ids = array('i', self.type_ids)
+        layout.rotated = array('b', self.rotated)
+        layout._type_index = dict(self._type_index)
+        return layout
+
+    def placement(self, index: int) -> Dict:
+        """Словарное представление одного размещения"""
+        return {
+            'figure': self.figures[self.type_ids[index]],
+            'x': self.xs[index],
+            'y': self.ys[index],
+            'rotated': bool(self.rotated[index])
+        }
+
+    def __len__(self) -> int:
+        return len(self.xs)
+
+    def __iter__(self) -> Iterator[Dict]:
+        for index in range(len(self.xs)):
+            yield self.placement(index)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict, List[Dict]]:
+        if isinstance(index, slice):
+            return [self.placement(i) for i in range(*index.indices(len(self.xs)))]
+        if index < 0:
+            index += len(self.xs)
+        if not 0 <= index < len(self.xs):
+            raise IndexError('layout index out of range')
+        return self.placement(index)
+
+    def __getstate__(self):
+        return (self.figures, self.xs, self.ys, self.type_ids, self.rotated)
+
+    def __setstate__(self, state):
+        self.figures, self.xs, self.ys, self.type_ids, self.rotated = state
+        self._type_index = {id(figure): type_id for type_id, figure in enumerate(self.figures)}
@@ -0,0 +1,150 @@
+from typing import List, Dict, Tuple, Optional, Iterator
+from entity.container import Container, GuillotineNode
+from entity.layout import Layout
+from bisect import bisect_left
+
+class FreeRectIndex:
+    """
+    Индекс свободных листовых узлов гильотинного дерева, упорядоченный по площади.
+    Ключ узла - (площадь, путь от корня), где путь кодирует порядок обхода дерева
+    (сначала down, затем right), поэтому среди узлов равной площади выбирается тот же,
+    что и при полном обходе дерева
+    """
+    DOWN = 0
+    RIGHT = 1
+
+    def __init__(self, root: GuillotineNode):
+        self._keys: List[Tuple[int, Tuple[int, ...]]] = []
+        self._nodes: List[GuillotineNode] = []
+        self._paths: Dict[int, Tuple[int, ...]] = {}
+        self.last_scanned = 0  # Сколько узлов просмотрено при последнем поиске
+
+        # Собираем свободные листья уже существующего дерева
+        nodes_to_check = [(root, ())]
+        while nodes_to_check:
+            node, path = nodes_to_check.pop()
+            if not node.used:
+                self.add(node, path)
+                continue
+            if node.right:
+                nodes_to_check.append((node.right, path + (self.RIGHT,)))
+            if node.down:
+                nodes_to_check.append((node.down, path + (self.DOWN,)))
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __iter__(self) -> Iterator[GuillotineNode]:
+        """Перебирает свободные узлы по возрастанию площади"""
+        return iter(self._nodes)
+
+    def add(self, node: GuillotineNode, path: Tuple[int, ...]):
+        """Добавляет свободный узел в индекс"""
+        key = (node.width * node.height, path)
+        index = bisect_left(self._keys, key)
+        self._keys.insert(index, key)
+        self._nodes.insert(index, node)
+        self._paths[id(node)] = path
+
+    def remove(self, node: GuillotineNode) -> Tuple[int, ...]:
+        """Удаляет узел из индекса и возвращает его путь"""
+        path = self._paths.pop(id(node))
+        index = bisect_left(self._keys, (node.width * node.height, path))
+        del self._keys[index]
+        del self._nodes[index]
+        return path
+
+    def find_best_fit(self, width: int, height: int) -> Optional[GuillotineNode]:
+        """Возвращает свободный узел минимальной площади, вмещающий прямоугольник"""
+        index = bisect_left(self._keys, (width * height,))
+        nodes = self._nodes
+        for i in range(index, len(nodes)):
+            node = nodes[i]
+            if node.width >= width and node.height >= height:
+                self.last_scanned = i - index + 1
+                return node
+        self.last_scanned = len(nodes) - index
+        return None
+
+    def largest(self) -> Optional[GuillotineNode]:
+        """Свободный узел наибольшей площади"""
+        return self._nodes[-1] if self._nodes else None
+
+    def split(self, node: GuillotineNode):
+        """Заменяет занятый узел в индексе его дочерними узлами"""
+        path = self.remove(node)
+        if node.down:
+            self.add(node.down, path + (self.DOWN,))
+        if node.right:
+            self.add(node.right, path + (self.RIGHT,))
+
+class PackingSession:
+    """
+    Состояние упаковки одного листа: дерево свободного пространства,
+    индекс свободных узлов и уже выполненные размещения.
+    Контейнер остается неизменяемой спецификацией, поэтому один контейнер
+    может использоваться любым числом сессий, в том числе в разных потоках
+    """
+    def __init__(self, container: Container, root: Optional[GuillotineNode] = None):
+        self.container = container
+        if root is None:
+            margin = container.margin
+            root = GuillotineNode(
+                margin, margin,
+                container.width - 2 * margin,
+                container.height - 2 * margin
+            )
+        self.root = root
+        self.free_index = FreeRectIndex(root)
+        self.placements = Layout()
+        self.placement_groups: List[Dict] = []
+
+    def fork(self) -> 'PackingSession':
+        """
+        Создает независимую копию частично упакованного листа.
+        Дерево копируется за один проход без deepcopy, размещения - копированием
+        типизированных массивов
+        """
+        root = self._copy_tree()
+        session = PackingSession(self.container, root)
+        session.placements = self.placements.copy()
+        session.placement_groups = [dict(group) for group in self.placement_groups]
+        return session
+
+    def _copy_tree(self) -> GuillotineNode:
+        root = None
+        nodes_to_copy = [(self.root, None, None)]
+        while nodes_to_copy:
+            node, parent, side = nodes_to_copy.pop()
+            copy = GuillotineNode(
+                node.x, node.y, node.width, node.height,
+                node.used, node.columns, node.rows
+            )
+            if parent is None:
+                root = copy
+            else:
+                setattr(parent, side, copy)
+            if node.right:
+                nodes_to_copy.append((node.right, copy, 'right'))
+            if node.down:
+                nodes_to_copy.append((node.down, copy, 'down'))
+        return root
+
+    def tree_stats(self) -> Dict[str, int]:
+        """Глубина дерева, число его узлов и свободных узлов"""
+        depth = 0
+        node_count = 0
+        nodes_to_check = [(self.root, 1)]
+        while nodes_to_check:
+            node, node_depth = nodes_to_check.pop()
+            node_count += 1
+            depth = max(depth, node_depth)
+            if node.right:
+                nodes_to_check.append((node.right, node_depth + 1))
+            if node.down:
+                nodes_to_check.append((node.down, node_depth + 1))
+        return {
+            'tree_depth': depth,
+            'tree_nodes': node_count,
+            'free_nodes': len(self.free_index)
+        }
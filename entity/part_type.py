@@ -0,0 +1,93 @@
+from typing import List, Dict, Tuple
+from entity.figure import Figure
+import itertools
+import threading
+import weakref
+
+class PartType:
+    """
+    Интернированный вид детали: размеры, возможность поворота и отступ.
+    Для каждого набора параметров в процессе существует один объект
+    с целочисленным id, поэтому виды сравниваются по ссылке, а хэшируются по id.
+    Детали одного размера с разными отступами или поворотом - разные виды.
+    При передаче в другой процесс вид интернируется заново по параметрам.
+    Реестр хранит виды по слабым ссылкам: вид, на который больше никто
+    не ссылается, удаляется, поэтому долгоживущий процесс не накапливает виды
+    """
+    __slots__ = ('id', 'width', 'height', 'rotation', 'margin', 'label', '__weakref__')
+
+    _registry: 'weakref.WeakValueDictionary[Tuple[int, int, bool, int], PartType]' = weakref.WeakValueDictionary()
+    _ids = itertools.count()  # id не переиспользуются после удаления видов из реестра
+    _lock = threading.Lock()
+
+    def __new__(cls, width: int, height: int, rotation: bool = True, margin: int = 0):
+        key = (width, height, bool(rotation), margin)
+        part_type = cls._registry.get(key)
+        if part_type is not None:
+            return part_type
+        with cls._lock:
+            part_type = cls._registry.get(key)
+            if part_type is None:
+                part_type = object.__new__(cls)
+                for name, value in zip(('id', 'width', 'height', 'rotation', 'margin'), (next(cls._ids),) + key):
+                    object.__setattr__(part_type, name, value)
+                object.__setattr__(part_type, 'label', _label(*key))
+                cls._registry[key] = part_type
+        return part_type
+
+    @classmethod
+    def of(cls, figure: Figure) -> 'PartType':
+        """Вид детали фигуры (в исходной, не повернутой ориентации)"""
+        return cls(figure.width, figure.height, figure.rotation, figure.margin)
+
+    @classmethod
+    def of_placed(cls, figure: Figure, rotated: bool) -> 'PartType':
+        """Вид детали по размещенной фигуре: повернутая фигура хранит размеры в ориентации размещения"""
+        if rotated:
+            return cls(figure.height, figure.width, figure.rotation, figure.margin)
+        return cls(figure.width, figure.height, figure.rotation, figure.margin)
+
+    def figure(self, necessary: int) -> Figure:
+        """Фигура этого вида с заданной потребностью"""
+        return Figure(self.width, self.height, necessary, self.rotation, self.margin)
+
+    def area(self) -> int:
+        return (self.width + self.margin * 2) * (self.height + self.margin * 2)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('PartType неизменяем')
+
+    def __hash__(self) -> int:
+        return self.id
+
+    def __reduce__(self):
+        return (PartType, (self.width, self.height, self.rotation, self.margin))
+
+    def __repr__(self) -> str:
+        return f"PartType#{self.id}({self.label})"
+
+    def __str__(self) -> str:
+        return self.label
+
+def merge_figures(figures: List[Figure]) -> List[Figure]:
+    """
+    Объединяет фигуры одного вида в одну с суммарной потребностью.
+    Порядок - по первому появлению вида, исходные фигуры не изменяются
+    """
+    merged: Dict[PartType, Figure] = {}
+    for figure in figures:
+        part_type = PartType.of(figure)
+        if part_type in merged:
+            merged[part_type].necessary += figure.necessary
+        else:
+            merged[part_type] = part_type.figure(figure.necessary)
+    return list(merged.values())
+
+def _label(width: int, height: int, rotation: bool, margin: int) -> str:
+    """Подпись вида: "WxH", отступ и запрет поворота указываются, только если заданы"""
+    label = f"{width}x{height}"
+    if margin:
+        label += f", отступ {margin}"
+    if not rotation:
+        label += ", без поворота"
+    return label
@@ -0,0 +1,15 @@
+from dataclasses import dataclass
+from typing import Optional
+from entity.container import Container
+
+@dataclass(frozen=True)
+class StockSheet:
+    """Позиция склада: лист или деловой остаток определенного размера"""
+    container: Container
+    quantity: Optional[int] = None  # Сколько листов есть на складе (None - без ограничения)
+    unit_cost: float = 1.0  # Стоимость одного листа
+    name: str = ''
+    
+    def __str__(self) -> str:
+        available = 'inf' if self.quantity is None else self.quantity
+        return f"StockSheet({self.name or self.container}, qty: {available}, cost: {self.unit_cost})"
@@ -1,13 +1,19 @@
-from rich.pretty import pprint as print
-from rich.table import Table
-from rich.console import Console
+from typing import Dict, Iterable, Iterator, Optional, TextIO
 from entity.figure import Figure
 from entity.container import Container
+from entity.part_type import PartType
+from service.engines import ENGINES
 from service.industrial_calc import IndustrialCalcService
+from service.layout_cache import LayoutCache
+from service.serialization import (
+    bool_from_value, container_from_dict, figures_from_list, strategy_from_str, orders_from_csv, to_jsonable
+)
+import argparse
+import itertools
+import json
+import sys
 
-def main() -> None:
-    console = Console()
-    
+def demo() -> None:
     # Промышленные параметры (например, стандартный лист 594x841 - A1)
     container = Container(width=594, height=841, margin=5)  # 5mm технологические отступы
     
@@ -18,7 +24,15 @@ def main() -> None:
         Figure(width=60, height=60, necessary=50, margin=3),
     ]
 
-    service = IndustrialCalcService(container, figures)
+    print_report(IndustrialCalcService(container, figures))
+
+def print_report(service: IndustrialCalcService) -> None:
+    """Человекочитаемый отчет; rich импортируется только здесь"""
+    from rich.table import Table
+    from rich.console import Console
+    
+    console = Console()
+    container = service.container
     result = service.calculate_production_plan()
     cutting_plan = service.generate_cutting_plan()
     
@@ -47,9 +61,9 @@ def main() -> None:
     table.add_column("Листов", style="yellow")
     table.add_column("Будет произведено", style="magenta")
     
-    for fig_key, plan in result['production_plan'].items():
+    for part_type, plan in result['production_plan'].items():
         table.add_row(
-            fig_key,
+            part_type.label,
             str(plan['necessary']),
             str(plan['per_sheet']),
             str(plan['sheets_needed']),
@@ -61,12 +75,120 @@ def main() -> None:
     # Координаты раскроя (для первого листа)
     console.print("\n📐 [bold]Координаты раскроя (первый лист):[/bold]")
     for placement in result['single_sheet_layout']['placements'][:10]:  # Покажем первые 10
-        fig = placement['figure']
+        part_type = PartType.of_placed(placement['figure'], placement['rotated'])
         console.print(
-            f"  {fig.width}x{fig.height} "
+            f"  {part_type.label} "
             f"@ ({placement['x']}, {placement['y']}) "
             f"{'🔄' if placement.get('rotated') else ''}"
         )
 
+def read_orders(file: TextIO, input_format: str) -> Iterator[Dict]:
+    """Потоково читает заказы из JSONL или CSV (auto - по первой непустой строке)"""
+    lines = iter(file)
+    if input_format == 'auto':
+        first_lines = []
+        for line in lines:
+            first_lines.append(line)
+            if line.strip():
+                break
+        input_format = 'jsonl' if ''.join(first_lines).lstrip().startswith('{') else 'csv'
+        lines = itertools.chain(first_lines, lines)
+    
+    if input_format == 'csv':
+        yield from orders_from_csv(lines)
+        return
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as error:
+            yield {'error': f"Некорректный JSON: {error}"}
+
+def build_service(order: Dict, bulk: bool, strategy: Optional[str], engine: str,
+                  cache: LayoutCache) -> IndustrialCalcService:
+    """Создает сервис расчета для заказа; параметры заказа важнее параметров командной строки"""
+    if 'error' in order:
+        raise ValueError(order['error'])
+    return IndustrialCalcService(
+        container_from_dict(order['container']),
+        figures_from_list(order['figures']),
+        bulk=bool_from_value(order.get('bulk', bulk)),
+        strategy=strategy_from_str(order.get('strategy', strategy)),
+        cache=cache,
+        engine=order.get('engine', engine)
+    )
+
+def run_batch(orders: Iterable[Dict], output: TextIO, operation: str, bulk: bool,
+              strategy: Optional[str], engine: str, pretty: bool) -> int:
+    """
+    Рассчитывает заказы по одному и пишет результат каждого сразу после расчета.
+    Кэш раскроев общий для всего потока: повторяющиеся заказы считаются один раз.
+    Возвращает число заказов с ошибками
+    """
+    cache = LayoutCache(max_entries=256)
+    failed = 0
+    for order in orders:
+        order_id = order.get('id') if isinstance(order, dict) else None
+        try:
+            if not isinstance(order, dict):
+                raise ValueError('Заказ должен быть объектом JSON')
+            service = build_service(order, bulk, strategy, engine, cache)
+            if pretty:
+                print_report(service)
+                continue
+            if operation == 'cutting_plan':
+                result = service.generate_cutting_plan()
+            elif operation == 'cutting_stock_plan':
+                result = service.calculate_cutting_stock_plan()
+            else:
+                result = service.calculate_production_plan()
+            response = {'id': order_id, 'ok': True, 'result': to_jsonable(result)}
+        except (KeyError, TypeError, ValueError) as error:
+            failed += 1
+            message = f"Нет поля {error}" if isinstance(error, KeyError) else str(error)
+            response = {'id': order_id, 'ok': False, 'error': {'code': 'bad_request', 'message': message}}
+            if pretty:
+                print(f"Заказ {order_id}: {message}", file=sys.stderr)
+                continue
+        except Exception as error:
+            # Сбой расчета одного заказа не должен останавливать поток
+            failed += 1
+            message = f"{type(error).__name__}: {error}"
+            response = {'id': order_id, 'ok': False, 'error': {'code': 'internal_error', 'message': message}}
+            if pretty:
+                print(f"Заказ {order_id}: {message}", file=sys.stderr)
+                continue
+        output.write(json.dumps(response, ensure_ascii=False) + '\n')
+        output.flush()
+    return failed
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description='Расчет раскроя. Без входного файла выводит демонстрационный отчет'
+    )
+    parser.add_argument('input', nargs='?', help='файл заказов JSONL или CSV, "-" - stdin')
+    parser.add_argument('--format', choices=('auto', 'jsonl', 'csv'), default='auto')
+    parser.add_argument('--output', choices=('cutting_plan', 'production_plan', 'cutting_stock_plan'),
+                        default='cutting_plan', help='cutting_stock_plan - несколько схем листа с кратностями')
+    parser.add_argument('--bulk', action='store_true', help='блочное размещение одинаковых фигур')
+    parser.add_argument('--strategy', default=None, help='sort_key/fit_rule/split_rule')
+    parser.add_argument('--engine', choices=list(ENGINES), default='guillotine', help='движок раскроя листа')
+    parser.add_argument('--pretty', action='store_true', help='человекочитаемый отчет вместо JSONL')
+    args = parser.parse_args()
+    
+    if args.input is None:
+        demo()
+        return 0
+    
+    if args.input == '-':
+        failed = run_batch(read_orders(sys.stdin, args.format), sys.stdout,
+                           args.output, args.bulk, args.strategy, args.engine, args.pretty)
+    else:
+        with open(args.input, encoding='utf-8', newline='') as file:
+            failed = run_batch(read_orders(file, args.format), sys.stdout,
+                               args.output, args.bulk, args.strategy, args.engine, args.pretty)
+    return 1 if failed else 0
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,105 @@
+from typing import List, Dict, Set, Optional, Iterator
+from entity.container import Container
+from entity.figure import Figure
+from service.guillotine_packer import GuillotinePacker, PackingStrategy
+from service.rating import RatingService
+import math
+import random
+import time
+
+class AnytimeOptimizer:
+    """
+    Улучшение жадного раскроя листа локальным поиском с отжигом.
+    Поиск меняет порядок вставки фигур и ориентацию, которая пробуется первой.
+    Лучший найденный раскрой доступен в любой момент через best
+    """
+    def __init__(self, container: Container, figures: List[Figure], bulk: bool = False,
+                 strategy: Optional[PackingStrategy] = None, seed: Optional[int] = None,
+                 initial_temperature: float = 0.01, cooling: float = 0.995):
+        self.container = container
+        self.figures = figures
+        self.bulk = bulk
+        self.strategy = strategy or PackingStrategy()
+        self.initial_temperature = initial_temperature
+        self.cooling = cooling
+        self.random = random.Random(seed)
+        self.iterations = 0
+
+        # Начинаем с жадного раскроя: порядок сортировки стратегии, без поворотов
+        packer = self._packer()
+        self.order: List[Figure] = packer.sort_figures(figures)
+        self.flipped: Set[int] = set()
+        self.current = packer.pack_in_order(self.order)
+        self.best = self.current
+        self.best_order = list(self.order)
+        self.best_flipped = set(self.flipped)
+
+    def improve(self, time_budget: Optional[float] = None,
+                max_iterations: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Ищет улучшения, пока не истечет time_budget секунд или max_iterations итераций,
+        и выдает каждый новый лучший раскрой. Без ограничений поиск идет, пока
+        вызывающий код продолжает итерацию
+        """
+        deadline = time.monotonic() + time_budget if time_budget is not None else None
+        temperature = self.initial_temperature
+        iteration = 0
+
+        while (max_iterations is None or iteration < max_iterations) and \
+                (deadline is None or time.monotonic() < deadline):
+            iteration += 1
+            self.iterations += 1
+            order, flipped = self._neighbour()
+            if order is None:
+                break
+
+            # Порог приема по Метрополису известен заранее, поэтому упаковку
+            # соседа можно прервать, как только он не сможет его превысить
+            threshold = self.current['efficiency'] + temperature * math.log(1.0 - self.random.random())
+            result = self._packer(rating=True).pack_in_order(order, flipped, cutoff=threshold)
+            temperature *= self.cooling
+
+            # Отсечка только прерывает заведомо плохие упаковки; завершенный сосед
+            # принимается, лишь если его эффективность не ниже порога
+            if result['abandoned'] or result['efficiency'] < threshold:
+                continue
+            self.order, self.flipped, self.current = order, flipped, result
+
+            if result['efficiency'] > self.best['efficiency']:
+                self.best = result
+                self.best_order = list(order)
+                self.best_flipped = set(flipped)
+                yield result
+
+    def run(self, time_budget: Optional[float] = None, max_iterations: Optional[int] = None) -> Dict:
+        """Выполняет поиск в пределах бюджета и возвращает лучший раскрой"""
+        if time_budget is None and max_iterations is None:
+            raise ValueError('Нужно задать time_budget или max_iterations')
+        for _ in self.improve(time_budget, max_iterations):
+            pass
+        return self.best
+
+    def _neighbour(self):
+        """Случайный соседний вариант: перестановка двух фигур или смена ориентации"""
+        order = list(self.order)
+        flipped = set(self.flipped)
+        rotatable = [position for position, fig in enumerate(order) if fig.rotation]
+        can_swap = len(order) > 1
+        if not can_swap and not rotatable:
+            return None, None
+
+        if rotatable and (not can_swap or self.random.random() < 0.3):
+            position = self.random.choice(rotatable)
+            flipped ^= {position}
+        else:
+            i, j = self.random.sample(range(len(order)), 2)
+            order[i], order[j] = order[j], order[i]
+            # Признак поворота следует за фигурой
+            flipped = {j if p == i else i if p == j else p for p in flipped}
+        return order, flipped
+
+    def _packer(self, rating: bool = False) -> GuillotinePacker:
+        return GuillotinePacker(
+            self.container, self.figures, bulk=self.bulk, strategy=self.strategy,
+            rating=RatingService(self.container, self.figures) if rating else None
+        )
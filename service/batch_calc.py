@@ -0,0 +1,67 @@
+from typing import List, Dict, Tuple, Iterable, Optional
+from concurrent.futures import ProcessPoolExecutor
+from entity.container import Container
+from entity.figure import Figure
+from service.guillotine_packer import PackingStrategy
+from service.industrial_calc import IndustrialCalcService, production_plan_key
+from service.layout_cache import LayoutCache
+
+class BatchCalcService:
+    """
+    Пакетный расчет производственных планов для множества независимых заказов.
+    Одинаковые задания считаются один раз, остальные распределяются по пулу процессов
+    """
+    def __init__(self, max_workers: Optional[int] = None, chunksize: int = 16,
+                 bulk: bool = False, strategy: Optional[PackingStrategy] = None,
+                 cache: Optional[LayoutCache] = None, engine: str = 'guillotine'):
+        self.max_workers = max_workers
+        self.chunksize = chunksize
+        self.bulk = bulk
+        self.strategy = strategy or PackingStrategy()
+        self.cache = cache
+        self.engine = engine  # Движок раскроя листа из service.engines.ENGINES
+
+    def calculate_production_plans(self, jobs: Iterable[Tuple[Container, List[Figure]]]) -> List[Dict]:
+        """
+        Рассчитывает планы для заданий (контейнер, фигуры).
+        Результаты возвращаются в порядке заданий; одинаковые задания получают
+        один и тот же объект плана, который не следует изменять
+        """
+        job_keys = []
+        unique_jobs = {}
+        plans = {}
+
+        # Шаг 1: Находим одинаковые задания и уже рассчитанные планы
+        for container, figures in jobs:
+            key = production_plan_key(container, figures, self.bulk, self.strategy, self.engine)
+            job_keys.append(key)
+            if key in plans or key in unique_jobs:
+                continue
+            cached_plan = self.cache.get(key) if self.cache is not None else None
+            if cached_plan is not None:
+                plans[key] = cached_plan
+            else:
+                unique_jobs[key] = (container, figures, self.bulk, self.strategy, self.engine)
+
+        # Шаг 2: Считаем уникальные задания (в пуле, если их больше одного)
+        keys = list(unique_jobs)
+        if len(keys) > 1 and self.max_workers != 1:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                results = list(executor.map(_calculate_plan, unique_jobs.values(), chunksize=self.chunksize))
+        else:
+            results = [_calculate_plan(job) for job in unique_jobs.values()]
+
+        for key, plan in zip(keys, results):
+            if self.cache is not None:
+                plan = self.cache.put(key, plan)
+            plans[key] = plan
+
+        # Шаг 3: Восстанавливаем исходный порядок заданий
+        return [plans[key] for key in job_keys]
+
+def _calculate_plan(job: Tuple[Container, List[Figure], bool, PackingStrategy, str]) -> Dict:
+    """Рассчитывает план одного задания (выполняется в процессе пула)"""
+    container, figures, bulk, strategy, engine = job
+    return IndustrialCalcService(
+        container, figures, bulk=bulk, strategy=strategy, engine=engine
+    ).calculate_production_plan()
@@ -1,7 +1,9 @@
 from typing import List, Dict, Tuple
 from entity.container import Container
 from entity.figure import Figure
+from entity.part_type import PartType, merge_figures
 from dataclasses import dataclass
+import numpy as np
 import math
 
 @dataclass
@@ -15,29 +17,34 @@ class Placement:
 class CalcService:
     def __init__(self, container: Container, figures: List[Figure]):
         self.container = container
-        self.figures = figures
+        # Одинаковые детали объединяются заранее, поэтому все фигуры - разных видов
+        self.figures = merge_figures(figures)
+        self.part_types = [PartType.of(fig) for fig in self.figures]
     
     def find_optimal_container_packing(self) -> Dict:
         """
         Находит оптимальное размещение фигур в одном контейнере
         Возвращает схему упаковки и количество каждого типа фигур
         """
+        evaluation = self._evaluate_packing_schemes()
+        valid = evaluation['valid']
+        
         best_scheme = None
         best_efficiency = 0
         best_total_figures = 0
         
-        # Генерируем различные комбинации размещения
-        schemes = self._generate_packing_schemes()
-        
-        for scheme in schemes:
-            efficiency = self._calculate_scheme_efficiency(scheme)
-            total_figures = sum(scheme.values())
+        # Выбираем схему с лучшей эффективностью и максимальным количеством фигур,
+        # при равенстве - первую в порядке генерации
+        if valid.any():
+            used_area = np.where(valid, evaluation['used_area'], -1)
+            best_used = used_area == used_area.max()
+            total_figures = np.where(best_used, evaluation['total_figures'], -1)
+            best_index = int(np.argmax(total_figures))
             
-            # Выбираем схему с лучшей эффективностью и максимальным количеством фигур
-            if efficiency > best_efficiency or (efficiency == best_efficiency and total_figures > best_total_figures):
-                best_efficiency = efficiency
-                best_total_figures = total_figures
-                best_scheme = scheme
+            if used_area[best_index] > 0 or total_figures[best_index] > 0:
+                best_scheme = self._scheme_at(evaluation, best_index)
+                best_efficiency = int(used_area[best_index]) / self.container.area
+                best_total_figures = int(total_figures[best_index])
         
         return {
             'packing_scheme': best_scheme,
@@ -46,102 +53,111 @@ class CalcService:
             'total_figures_per_container': best_total_figures
         }
     
-    def _generate_packing_schemes(self) -> List[Dict[str, int]]:
+    def _generate_packing_schemes(self) -> List[Dict[PartType, int]]:
         """Генерирует возможные схемы упаковки фигур в контейнер"""
-        schemes = []
-        
-        # Пробуем разные комбинации фигур
-        for fig1 in self.figures:
-            # Схема с одной фигурой
-            scheme_single = self._create_scheme_with_figure(fig1)
-            if scheme_single:
-                schemes.append(scheme_single)
-            
-            # Схемы с комбинациями фигур
-            for fig2 in self.figures:
-                if fig1 != fig2:
-                    scheme_double = self._create_scheme_with_two_figures(fig1, fig2)
-                    if scheme_double:
-                        schemes.append(scheme_double)
-        
-        return schemes
+        evaluation = self._evaluate_packing_schemes()
+        return [
+            self._scheme_at(evaluation, index)
+            for index in np.flatnonzero(evaluation['valid'])
+        ]
     
-    def _create_scheme_with_figure(self, figure: Figure) -> Dict[str, int]:
-        """Создает схему упаковки с одной фигурой"""
-        # Пробуем обе ориентации
-        count_original = self._calculate_max_fit(figure.width, figure.height)
-        count_rotated = self._calculate_max_fit(figure.height, figure.width)
-        
-        count = max(count_original, count_rotated)
+    def _evaluate_packing_schemes(self) -> Dict[str, np.ndarray]:
+        """
+        Рассчитывает все схемы упаковки одним проходом над массивами.
+        Схемы располагаются в матрице n x (n + 1): столбец 0 - схема с одной фигурой,
+        столбец 1 + j - схема с фигурами i и j. При развертке по строкам
+        порядок схем совпадает с порядком перебора фигур
+        """
+        n = len(self.figures)
+        widths = np.array([fig.width for fig in self.figures], dtype=np.int64)
+        heights = np.array([fig.height for fig in self.figures], dtype=np.int64)
+        areas = np.array([fig.area() for fig in self.figures], dtype=np.int64)
+        raw_areas = widths * heights
+        
+        # Схемы с одной фигурой: лучшая из двух ориентаций
+        single_counts = np.maximum(
+            self._calculate_max_fit(widths, heights),
+            self._calculate_max_fit(heights, widths)
+        )
+        
+        # Схемы с двумя фигурами перебирают четыре комбинации ориентаций;
+        # схема заменяется, если новая площадь (с отступами) больше площади текущей
+        orientations = ((widths, heights), (heights, widths))
+        counts1 = np.zeros((n, n), dtype=np.int64)
+        counts2 = np.zeros((n, n), dtype=np.int64)
+        selected_area = np.zeros((n, n), dtype=np.int64)
+        
+        for width1, height1 in orientations:
+            for width2, height2 in orientations:
+                count1, count2 = self._calculate_combined_fit(
+                    width1[:, None], height1[:, None], width2[None, :], height2[None, :]
+                )
+                current_area = count1 * areas[:, None] + count2 * areas[None, :]
+                replace = ((count1 > 0) | (count2 > 0)) & (current_area > selected_area)
+                
+                counts1 = np.where(replace, count1, counts1)
+                counts2 = np.where(replace, count2, counts2)
+                selected_area = np.where(
+                    replace,
+                    count1 * raw_areas[:, None] + count2 * raw_areas[None, :],
+                    selected_area
+                )
+        
+        # Пара фигуры с самой собой не рассматривается (остальные пары - разных видов)
+        pair_valid = ~np.eye(n, dtype=bool) & ((counts1 > 0) | (counts2 > 0))
+        
+        # Собираем матрицу схем n x (n + 1)
+        first_counts = np.column_stack([single_counts, counts1])
+        second_counts = np.column_stack([np.zeros(n, dtype=np.int64), counts2])
+        valid = np.column_stack([single_counts > 0, pair_valid])
+        used_area = first_counts * raw_areas[:, None] + second_counts * np.concatenate([[0], raw_areas])[None, :]
         
-        if count > 0:
-            return {f"{figure.width}x{figure.height}": count}
-        return None
+        return {
+            'first_counts': first_counts.ravel(),
+            'second_counts': second_counts.ravel(),
+            'used_area': used_area.ravel(),
+            'total_figures': (first_counts + second_counts).ravel(),
+            'efficiency': used_area.ravel() / self.container.area,
+            'valid': valid.ravel()
+        }
     
-    def _create_scheme_with_two_figures(self, fig1: Figure, fig2: Figure) -> Dict[str, int]:
-        """Создает схему упаковки с двумя типами фигур"""
+    def _scheme_at(self, evaluation: Dict[str, np.ndarray], index: int) -> Dict[PartType, int]:
+        """Собирает словарь схемы (вид детали -> количество) по ее индексу в матрице схем"""
+        row, column = divmod(int(index), len(self.figures) + 1)
         scheme = {}
-        
-        # Пробуем разные комбинации размещения
-        for orientation1 in ['original', 'rotated']:
-            for orientation2 in ['original', 'rotated']:
-                width1 = fig1.width if orientation1 == 'original' else fig1.height
-                height1 = fig1.height if orientation1 == 'original' else fig1.width
-                
-                width2 = fig2.width if orientation2 == 'original' else fig2.height
-                height2 = fig2.height if orientation2 == 'original' else fig2.width
-                
-                # Пробуем разместить оба типа фигур
-                count1, count2 = self._calculate_combined_fit(width1, height1, width2, height2)
-                
-                if count1 > 0 or count2 > 0:
-                    key1 = f"{fig1.width}x{fig1.height}"
-                    key2 = f"{fig2.width}x{fig2.height}"
-                    
-                    current_scheme = {}
-                    if count1 > 0:
-                        current_scheme[key1] = count1
-                    if count2 > 0:
-                        current_scheme[key2] = count2
-                    
-                    # Выбираем схему с максимальным использованием площади
-                    current_area = count1 * fig1.area() + count2 * fig2.area()
-                    existing_area = sum(scheme.get(k, 0) * Figure(*map(int, k.split('x')), 0).area() 
-                                      for k in scheme.keys())
-                    
-                    if current_area > existing_area:
-                        scheme = current_scheme
-        
-        return scheme if scheme else None
+        count1 = int(evaluation['first_counts'][index])
+        if count1 > 0:
+            scheme[self.part_types[row]] = count1
+        if column > 0:
+            count2 = int(evaluation['second_counts'][index])
+            if count2 > 0:
+                scheme[self.part_types[column - 1]] = count2
+        return scheme
     
-    def _calculate_max_fit(self, width: int, height: int) -> int:
-        """Рассчитывает максимальное количество фигур, помещающихся в контейнер"""
+    def _calculate_max_fit(self, width, height):
+        """Рассчитывает максимальное количество фигур, помещающихся в контейнер (также для массивов)"""
         return (self.container.width // width) * (self.container.height // height)
     
-    def _calculate_combined_fit(self, width1: int, height1: int, width2: int, height2: int) -> Tuple[int, int]:
+    def _calculate_combined_fit(self, width1, height1, width2, height2) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Упрощенный расчет комбинированного размещения
+        Упрощенный расчет комбинированного размещения (для массивов размеров)
         В реальной реализации здесь должен быть более сложный алгоритм
         """
         # Пробуем разместить сначала первый тип, затем второй в оставшемся месте
         count1 = self._calculate_max_fit(width1, height1)
         remaining_area = self.container.area - count1 * width1 * height1
         
-        if remaining_area > 0:
-            count2 = min(self._calculate_max_fit(width2, height2), 
-                        remaining_area // (width2 * height2))
-        else:
-            count2 = 0
-        
+        count2 = np.where(
+            remaining_area > 0,
+            np.minimum(self._calculate_max_fit(width2, height2), remaining_area // (width2 * height2)),
+            0
+        )
+        count1, count2 = np.broadcast_arrays(count1, count2)
         return count1, count2
     
-    def _calculate_scheme_efficiency(self, scheme: Dict[str, int]) -> float:
+    def _calculate_scheme_efficiency(self, scheme: Dict[PartType, int]) -> float:
         """Рассчитывает эффективность использования площади для схемы"""
-        total_area_used = 0
-        for fig_key, count in scheme.items():
-            w, h = map(int, fig_key.split('x'))
-            total_area_used += count * w * h
-        
+        total_area_used = sum(count * part_type.width * part_type.height for part_type, count in scheme.items())
         return total_area_used / self.container.area
     
     def calculate_required_containers(self) -> Dict:
@@ -154,15 +170,14 @@ class CalcService:
         containers_needed = 0
         figures_placement = {}
         
-        for figure in self.figures:
-            fig_key = f"{figure.width}x{figure.height}"
-            figures_per_container = packing_scheme.get(fig_key, 0)
+        for part_type, figure in zip(self.part_types, self.figures):
+            figures_per_container = packing_scheme.get(part_type, 0)
             
             if figures_per_container > 0:
                 containers_for_figure = math.ceil(figure.necessary / figures_per_container)
                 containers_needed = max(containers_needed, containers_for_figure)
                 
-                figures_placement[fig_key] = {
+                figures_placement[part_type] = {
                     'necessary': figure.necessary,
                     'per_container': figures_per_container,
                     'containers_needed': containers_for_figure
@@ -170,8 +185,8 @@ class CalcService:
         
         # Рассчитываем фактическое количество произведенных фигур
         actual_produced = {}
-        for fig_key, info in figures_placement.items():
-            actual_produced[fig_key] = packing_scheme.get(fig_key, 0) * containers_needed
+        for part_type, info in figures_placement.items():
+            actual_produced[part_type] = packing_scheme.get(part_type, 0) * containers_needed
         
         return {
             'optimal_packing_scheme': packing_scheme,
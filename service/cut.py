@@ -1,3 +1,156 @@
+from typing import List, Iterator, Optional
+from dataclasses import dataclass
+from entity.container import GuillotineNode
+from entity.packing_session import PackingSession
+from service.guillotine_packer import GuillotinePacker
+
+VERTICAL = 'vertical'
+HORIZONTAL = 'horizontal'
+
+@dataclass
+class Cut:
+    """Сквозной гильотинный рез: линия position от start до end"""
+    sheet: int
+    orientation: str
+    position: int
+    start: int
+    end: int
+
+    @property
+    def length(self) -> int:
+        return self.end - self.start
+
 class CuttingService:
-    def __init__(self):
-        pass
\ No newline at end of file
+    """
+    Строит последовательность гильотинных резов по дереву упаковки.
+    Резы выдаются генератором, поэтому план из сотен листов
+    можно передавать на станок по мере расчета
+    """
+    def __init__(self, trim_edges: bool = True):
+        self.trim_edges = trim_edges  # Резать технологические кромки листа
+
+    def iter_cuts(self, session: PackingSession, sheet_index: int = 0) -> Iterator[Cut]:
+        """
+        Выдает резы одного листа. Соседние резы на одной линии объединяются,
+        порядок обхода старается сохранять направление реза, чтобы реже
+        поворачивать лист
+        """
+        return self._merge(self._iter_raw_cuts(session, sheet_index))
+
+    def iter_production_cuts(self, packer: GuillotinePacker, max_sheets: Optional[int] = None) -> Iterator[Cut]:
+        """
+        Упаковывает заказ лист за листом и выдает резы каждого листа сразу после его упаковки.
+        В памяти находится только дерево текущего листа
+        """
+        for result in packer.iter_containers(max_sheets):
+            yield from self.iter_cuts(packer.session, result['sheet_index'])
+
+    def _iter_raw_cuts(self, session: PackingSession, sheet: int) -> Iterator[Cut]:
+        container = session.container
+        margin = container.margin
+        orientation = None
+
+        # Обрезка кромок листа
+        if self.trim_edges and margin > 0:
+            yield Cut(sheet, VERTICAL, margin, 0, container.height)
+            yield Cut(sheet, VERTICAL, container.width - margin, 0, container.height)
+            yield Cut(sheet, HORIZONTAL, margin, margin, container.width - margin)
+            yield Cut(sheet, HORIZONTAL, container.height - margin, margin, container.width - margin)
+            orientation = HORIZONTAL
+
+        # Обход дерева в глубину: кусок материала дорезается до конца,
+        # прежде чем перейти к следующему
+        nodes_to_cut = [session.root]
+        while nodes_to_cut:
+            node = nodes_to_cut.pop()
+            if not node.used:
+                # Свободный узел - деловой остаток или отход, резов нет
+                continue
+
+            for cut in self._node_cuts(node, sheet, orientation):
+                orientation = cut.orientation
+                yield cut
+
+            # Следующим режем кусок, первый рез которого совпадает по направлению с последним
+            children = [child for child in (node.right, node.down) if child is not None and child.used]
+            children.sort(key=lambda child: _first_orientation(child) == orientation)
+            nodes_to_cut.extend(children)
+
+    def _node_cuts(self, node: GuillotineNode, sheet: int, orientation: Optional[str]) -> List[Cut]:
+        """Резы, отделяющие размещенную в узле деталь (блок деталей) от остатков узла"""
+        right, down = node.right, node.down
+        item_width = node.width - right.width if right else node.width
+        item_height = node.height - down.height if down else node.height
+
+        cuts = []
+        if right is not None and right.height == node.height:
+            # Сначала вертикальный рез на всю высоту узла
+            cuts.append(Cut(sheet, VERTICAL, node.x + item_width, node.y, node.y + node.height))
+            if down:
+                cuts.append(Cut(sheet, HORIZONTAL, node.y + item_height, node.x, node.x + item_width))
+        else:
+            # Сначала горизонтальный рез на всю ширину узла
+            if down:
+                cuts.append(Cut(sheet, HORIZONTAL, node.y + item_height, node.x, node.x + node.width))
+            if right:
+                cuts.append(Cut(sheet, VERTICAL, node.x + item_width, node.y, node.y + item_height))
+
+        if cuts:
+            orientation = cuts[-1].orientation
+        cuts.extend(self._block_cuts(node, item_width, item_height, sheet, orientation))
+        return cuts
+
+    def _block_cuts(self, node: GuillotineNode, block_width: int, block_height: int,
+                    sheet: int, orientation: Optional[str]) -> List[Cut]:
+        """
+        Резы блока columns x rows одинаковых деталей. Резы первого направления
+        проходят через весь блок, резы второго - по каждой полосе и затем объединяются
+        """
+        columns, rows = node.columns, node.rows
+        if columns == 1 and rows == 1:
+            return []
+        cell_width = block_width // columns
+        cell_height = block_height // rows
+        x, y = node.x, node.y
+
+        if orientation == HORIZONTAL and rows > 1 or columns == 1:
+            full = [Cut(sheet, HORIZONTAL, y + row * cell_height, x, x + block_width) for row in range(1, rows)]
+            strips = [
+                Cut(sheet, VERTICAL, x + column * cell_width, y + row * cell_height, y + (row + 1) * cell_height)
+                for column in range(1, columns)
+                for row in range(rows)
+            ]
+        else:
+            full = [Cut(sheet, VERTICAL, x + column * cell_width, y, y + block_height) for column in range(1, columns)]
+            strips = [
+                Cut(sheet, HORIZONTAL, y + row * cell_height, x + column * cell_width, x + (column + 1) * cell_width)
+                for row in range(1, rows)
+                for column in range(columns)
+            ]
+        return full + strips
+
+    def _merge(self, cuts: Iterator[Cut]) -> Iterator[Cut]:
+        """Объединяет подряд идущие резы на одной линии, продолжающие друг друга"""
+        pending = None
+        for cut in cuts:
+            if (pending is not None and cut.sheet == pending.sheet
+                    and cut.orientation == pending.orientation
+                    and cut.position == pending.position
+                    and cut.start == pending.end):
+                pending.end = cut.end
+                continue
+            if pending is not None:
+                yield pending
+            pending = Cut(cut.sheet, cut.orientation, cut.position, cut.start, cut.end)
+        if pending is not None:
+            yield pending
+
+def _first_orientation(node: GuillotineNode) -> Optional[str]:
+    """Направление первого реза узла"""
+    if node.right is not None and node.right.height == node.height:
+        return VERTICAL
+    if node.down is not None:
+        return HORIZONTAL
+    if node.right is not None:
+        return VERTICAL
+    return None
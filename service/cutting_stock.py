@@ -0,0 +1,194 @@
+from typing import List, Dict, Tuple, Optional
+from entity.container import Container
+from entity.figure import Figure
+from entity.part_type import PartType, merge_figures
+from service.engines import create_packer
+from service.layout_cache import LayoutCache
+from service.packer import PackingStrategy
+import math
+
+class CuttingStockService:
+    """
+    Раскрой партии набором различных схем листа с кратностями (схема x количество листов).
+    Схемы строятся последовательно: движок раскроя упаковывает оставшийся заказ,
+    схема повторяется, пока ни одна ее деталь не превысит остаток заказа.
+    Порядок упаковки задают оценки видов деталей: после каждого прохода оценка
+    вида, попавшего на лист с большими отходами, растет, и на следующем проходе
+    такие детали ставятся раньше и комбинируются с другими (коррекция оценок -
+    эвристический аналог двойственных цен генерации столбцов). Из проходов
+    выбирается план с наименьшим числом листов
+    """
+    def __init__(self, container: Container, figures: List[Figure], bulk: bool = False,
+                 strategy: Optional[PackingStrategy] = None, engine: str = 'guillotine',
+                 cache: Optional[LayoutCache] = None, max_iterations: int = 10):
+        self.container = container
+        self.figures = [figure for figure in merge_figures(figures) if figure.necessary > 0]
+        self.bulk = bulk
+        self.strategy = strategy or PackingStrategy()
+        self.engine = engine
+        self.cache = cache if cache is not None else LayoutCache(max_entries=1024)
+        self.max_iterations = max_iterations  # Проходов с коррекцией оценок
+        self.layouts_computed = 0
+        self.layouts_reused = 0
+
+    def calculate_plan(self) -> Dict:
+        """Подбирает схемы листа и их кратности, покрывающие заказ наименьшим числом листов"""
+        lower_bound = self._lower_bound()
+        # Начальная оценка вида - его площадь: первый проход совпадает с упаковкой по площади
+        prices = {PartType.of(figure): float(figure.area()) for figure in self.figures}
+        best = None
+        iterations = 0
+
+        for _ in range(self.max_iterations):
+            iterations += 1
+            patterns, remaining = self._sequential_plan(prices)
+            sheets = sum(count for _, count in patterns)
+            if best is None or (sheets, len(patterns)) < (best[0], len(best[1])):
+                best = (sheets, patterns, remaining)
+            if best[0] <= lower_bound:
+                break
+
+        _, patterns, remaining = best if best is not None else (0, [], [])
+        return self._plan(patterns, remaining, lower_bound, iterations)
+
+    def _sequential_plan(self, prices: Dict[PartType, float]) -> Tuple[List[Tuple[Dict, int]], List[Figure]]:
+        """
+        Один проход: схемы для остатка заказа с кратностями.
+        Обновляет оценки видов по отходам полученных схем
+        """
+        demand = {PartType.of(figure): figure.necessary for figure in self.figures}
+        usable_area = self._usable_area()
+        patterns: List[Tuple[Dict, int]] = []
+        corrected: Dict[PartType, List[float]] = {}
+
+        while demand:
+            layout = self._price_pattern(demand, prices)
+            figures_count = layout['figures_count']
+            if not figures_count:
+                # Остаток не помещается даже на пустой лист
+                break
+
+            # Повторяем схему, пока ни один вид не превысит остаток заказа
+            count = max(1, min(demand[part_type] // per_sheet for part_type, per_sheet in figures_count.items()))
+            patterns.append((layout, count))
+            for part_type, per_sheet in figures_count.items():
+                demand[part_type] -= min(demand[part_type], per_sheet * count)
+                if demand[part_type] == 0:
+                    del demand[part_type]
+                # Доля листа, приходящаяся на деталь с учетом отходов схемы
+                value = part_type.area() * usable_area / layout['used_area']
+                corrected.setdefault(part_type, []).append(value)
+
+        for part_type, values in corrected.items():
+            prices[part_type] = (prices[part_type] + max(values)) / 2
+        remaining = [part_type.figure(necessary) for part_type, necessary in demand.items()]
+        return patterns, remaining
+
+    def _price_pattern(self, demand: Dict[PartType, int], prices: Dict[PartType, float]) -> Dict:
+        """
+        Схема с наибольшей суммарной оценкой деталей среди раскроев остатка заказа
+        в нескольких порядках: по удельной оценке, по оценке детали и по площади
+        """
+        orders = {
+            tuple(sorted(demand, key=key, reverse=True))
+            for key in (
+                lambda part_type: (prices[part_type] / part_type.area(), part_type.area(), _dimensions(part_type)),
+                lambda part_type: (prices[part_type], _dimensions(part_type)),
+                lambda part_type: (part_type.area(), _dimensions(part_type))
+            )
+        }
+        best, best_value = None, None
+        for order in sorted(orders, key=lambda order: [_dimensions(part_type) for part_type in order]):
+            layout = self._pattern_layout([part_type.figure(demand[part_type]) for part_type in order])
+            value = (sum(prices[part_type] * count for part_type, count in layout['figures_count'].items()),
+                     layout['used_area'])
+            if best_value is None or value > best_value:
+                best, best_value = layout, value
+        return best
+
+    def _pattern_layout(self, figures: List[Figure]) -> Dict:
+        """Раскрой одного листа для остатка заказа в заданном порядке (из кэша, если уже считался)"""
+        order = tuple((fig.width, fig.height, fig.rotation, fig.margin) for fig in figures)
+        key = LayoutCache.fingerprint(
+            self.container, figures, bulk=self.bulk, strategy=str(self.strategy),
+            engine=self.engine, order=order
+        )
+        layout = self.cache.get(key)
+        if layout is not None:
+            self.layouts_reused += 1
+            return layout
+        self.layouts_computed += 1
+        packer = create_packer(self.engine, self.container, figures, bulk=self.bulk, strategy=self.strategy)
+        return self.cache.put(key, packer.pack_in_order(figures))
+
+    def _plan(self, patterns: List[Tuple[Dict, int]], remaining: List[Figure],
+              lower_bound: int, iterations: int) -> Dict:
+        # Схемы с одинаковым составом деталей объединяются в одну запись
+        merged: Dict[Tuple, Dict] = {}
+        for layout, count in patterns:
+            key = tuple(sorted((_dimensions(part_type), per_sheet) for part_type, per_sheet in layout['figures_count'].items()))
+            if key in merged:
+                merged[key]['count'] += count
+            else:
+                merged[key] = {
+                    'layout': layout,
+                    'figures_count': layout['figures_count'],
+                    'count': count,
+                    'used_area': layout['used_area'],
+                    'efficiency': layout['efficiency']
+                }
+        plan_patterns = sorted(merged.values(), key=lambda pattern: pattern['count'], reverse=True)
+
+        produced: Dict[PartType, int] = {}
+        for pattern in plan_patterns:
+            for part_type, per_sheet in pattern['figures_count'].items():
+                produced[part_type] = produced.get(part_type, 0) + per_sheet * pattern['count']
+        production_plan = {}
+        for figure in self.figures:
+            part_type = PartType.of(figure)
+            total_produced = produced.get(part_type, 0)
+            production_plan[part_type] = {
+                'necessary': figure.necessary,
+                'total_produced': total_produced,
+                'overproduction': max(0, total_produced - figure.necessary)
+            }
+
+        sheets_required = sum(pattern['count'] for pattern in plan_patterns)
+        total_material_area = self.container.area * sheets_required
+        total_used_area = sum(pattern['used_area'] * pattern['count'] for pattern in plan_patterns)
+        return {
+            'patterns': plan_patterns,
+            'sheets_required': sheets_required,
+            'sheets_lower_bound': lower_bound,
+            'production_plan': production_plan,
+            'efficiency': total_used_area / total_material_area if total_material_area > 0 else 0,
+            'waste_area': total_material_area - total_used_area,
+            'remaining_figures': remaining,
+            'iterations': iterations,
+            'layouts_computed': self.layouts_computed,
+            'layouts_reused': self.layouts_reused
+        }
+
+    def _usable_area(self) -> int:
+        margin = self.container.margin
+        return max(0, self.container.width - 2 * margin) * max(0, self.container.height - 2 * margin)
+
+    def _lower_bound(self) -> int:
+        """Нижняя оценка числа листов: площадь заказа на полезную площадь листа"""
+        usable_area = self._usable_area()
+        if usable_area == 0:
+            return 0
+        margin = self.container.margin
+        width, height = self.container.width - 2 * margin, self.container.height - 2 * margin
+        # Детали, которые не помещаются на лист, в план не попадают и в оценке не учитываются
+        placeable_area = 0
+        for figure in self.figures:
+            fig_width, fig_height = figure.size_with_margin()
+            if fig_width <= width and fig_height <= height or \
+                    figure.rotation and fig_height <= width and fig_width <= height:
+                placeable_area += figure.area() * figure.necessary
+        return math.ceil(placeable_area / usable_area)
+
+def _dimensions(part_type: PartType) -> Tuple[int, int, int, bool]:
+    """Параметры вида для детерминированного порядка (id видов зависят от процесса)"""
+    return part_type.width, part_type.height, part_type.margin, part_type.rotation
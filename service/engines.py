@@ -0,0 +1,23 @@
+from typing import List, Dict, Type, Optional
+from entity.container import Container
+from entity.figure import Figure
+from service.guillotine_packer import GuillotinePacker
+from service.maxrects_packer import MaxRectsPacker
+from service.metrics import PackingMetrics
+from service.packer import Packer, PackingStrategy
+from service.skyline_packer import SkylinePacker
+
+# Движки раскроя листа; все возвращают результат общей схемы Packer
+ENGINES: Dict[str, Type[Packer]] = {
+    'guillotine': GuillotinePacker,
+    'maxrects': MaxRectsPacker,
+    'skyline': SkylinePacker,
+}
+
+def create_packer(engine: str, container: Container, figures: List[Figure], bulk: bool = False,
+                  strategy: Optional[PackingStrategy] = None,
+                  metrics: Optional[PackingMetrics] = None) -> Packer:
+    """Создает движок раскроя по имени из ENGINES"""
+    if engine not in ENGINES:
+        raise ValueError(f"Неизвестный движок раскроя: {engine}. Доступны: {', '.join(ENGINES)}")
+    return ENGINES[engine](container, figures, bulk=bulk, strategy=strategy, metrics=metrics)
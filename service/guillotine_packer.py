@@ -1,50 +1,118 @@
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Optional, Iterator, Set
 from entity.container import Container, GuillotineNode
 from entity.figure import Figure
-import math
+from entity.packing_session import PackingSession
+from service.metrics import PackingMetrics, measure_phase
+from service.packer import Packer, PackingStrategy, SORT_KEYS, FIT_RULES, SPLIT_RULES
+from service.rating import RatingService
 
-class GuillotinePacker:
-    def __init__(self, container: Container, figures: List[Figure]):
-        self.container = container
-        self.figures = figures
+class GuillotinePacker(Packer):
+    def __init__(self, container: Container, figures: List[Figure], bulk: bool = False,
+                 strategy: Optional[PackingStrategy] = None, metrics: Optional[PackingMetrics] = None,
+                 rating: Optional[RatingService] = None):
+        super().__init__(container, figures, bulk, strategy, metrics)
+        self.rating = rating  # Инкрементальная оценка текущего листа
         self.placement_log = []
+        self.session = PackingSession(container)
     
-    def pack_single_container(self) -> Dict:
-        """Упаковывает фигуры в один контейнер с гильотинным алгоритмом"""
-        # Сортируем фигуры по убыванию площади
-        sorted_figures = sorted(self.figures, key=lambda x: x.area(), reverse=True)
+    def pack_single_container(self, figures: Optional[List[Figure]] = None,
+                              session: Optional[PackingSession] = None,
+                              cutoff: Optional[float] = None) -> Dict:
+        """
+        Упаковывает фигуры в один контейнер с гильотинным алгоритмом.
+        Если передана сессия (например, ответвление частично упакованного листа),
+        упаковка продолжается в ее свободном пространстве.
+        С оценкой rating и порогом cutoff упаковка прерывается, как только лист
+        уже не может превысить эффективность cutoff (результат помечается 'abandoned')
+        """
+        if figures is None:
+            figures = self.figures
+        with measure_phase(self.metrics, 'sort'):
+            sorted_figures = self.sort_figures(figures)
+        return self.pack_in_order(sorted_figures, session=session, cutoff=cutoff)
+    
+    def pack_in_order(self, figures: List[Figure], flipped: Optional[Set[int]] = None,
+                      session: Optional[PackingSession] = None,
+                      cutoff: Optional[float] = None) -> Dict:
+        """
+        Упаковывает фигуры в заданном порядке, без сортировки.
+        Для фигур с номерами из flipped сначала пробуется повернутая ориентация
+        """
+        if session is not None:
+            self.session = session
+        session = self.session
+        metrics = self.metrics
+        
+        with measure_phase(metrics, 'pack'):
+            result = self._pack_sorted(figures, session, cutoff, flipped)
         
-        placements = []
+        if metrics is not None:
+            for name, value in session.tree_stats().items():
+                metrics.gauge(name, value)
+            result['metrics'] = metrics.as_dict()
+        return result
+    
+    def _pack_sorted(self, sorted_figures: List[Figure], session: PackingSession,
+                     cutoff: Optional[float] = None, flipped: Optional[Set[int]] = None) -> Dict:
+        """Размещает отсортированные фигуры в свободном пространстве сессии"""
+        metrics = self.metrics
+        rating = self.rating
+        placements = session.placements
+        placement_groups = session.placement_groups
         remaining_figures = []
+        abandoned = False
         
-        for figure in sorted_figures:
+        for position, figure in enumerate(sorted_figures):
             placed_count = 0
             needed = figure.necessary
+            rotated_figure = figure.rotated() if figure.rotation else None
             
-            while placed_count < needed:
+            # Основная и запасная ориентации фигуры
+            primary, alternate = figure, rotated_figure
+            if flipped and position in flipped and rotated_figure:
+                primary, alternate = rotated_figure, figure
+            
+            while placed_count < needed and not abandoned:
                 # Пробуем разместить фигуру
-                placement = self._find_best_fit(figure)
-                if placement:
-                    placements.append(placement)
+                placed_figure = primary
+                placement = self._find_best_fit(primary)
+                if placement and primary is rotated_figure:
+                    placement['rotated'] = True
+                if not placement and alternate:
+                    # Не помещается - пробуем повернутую версию если разрешено
+                    if metrics is not None:
+                        metrics.increment('rotation_retries')
+                    placed_figure = alternate
+                    placement = self._find_best_fit(alternate)
+                    if placement and alternate is rotated_figure:
+                        placement['rotated'] = True
+                if not placement:
+                    if metrics is not None:
+                        metrics.increment('failed_fits')
+                    break
+                
+                if self.bulk:
+                    # Заполняем выбранный узел сразу блоком одинаковых фигур
+                    group = self._place_block(placement, placed_figure, needed - placed_count)
+                    placement_groups.append(group)
+                    placements.add_block(
+                        placed_figure, group['x'], group['y'],
+                        group['columns'], group['rows'], group['rotated']
+                    )
+                    placed_count += group['count']
+                    placed_now = group['count']
+                else:
+                    placements.add(placed_figure, placement['x'], placement['y'], placement['rotated'])
                     placed_count += 1
+                    placed_now = 1
                     # Обновляем дерево гильотинных узлов
-                    self._split_node(placement['node'], figure)
-                else:
-                    # Не помещается - пробуем повернутую версию если разрешено
-                    if figure.rotation:
-                        rotated_figure = figure.rotated()
-                        placement = self._find_best_fit(rotated_figure)
-                        if placement:
-                            placements.append({
-                                **placement,
-                                'rotated': True
-                            })
-                            placed_count += 1
-                            self._split_node(placement['node'], rotated_figure)
-                        else:
-                            break
-                    else:
-                        break
+                    self._split_node(placement['node'], placed_figure)
+                
+                if rating is not None:
+                    rating.on_place(placed_figure, placed_now)
+                    # Лист уже не может превзойти лучший найденный - прекращаем упаковку
+                    if cutoff is not None and not rating.can_beat(cutoff):
+                        abandoned = True
             
             # Записываем сколько не удалось разместить
             if placed_count < needed:
@@ -56,53 +124,58 @@ class GuillotinePacker:
         
         # Собираем статистику
         figures_count = self._count_figures(placements)
-        used_area = sum(placement['figure'].area() for placement in placements)
+        used_area = placements.used_area
         efficiency = used_area / self.container.area
         
         return {
-            'placements': placements,
+            'placements': placements.copy(),
+            'placement_groups': list(placement_groups),
             'figures_count': figures_count,
             'used_area': used_area,
             'efficiency': efficiency,
-            'remaining_figures': remaining_figures
+            'remaining_figures': remaining_figures,
+            **({'abandoned': abandoned} if cutoff is not None else {})
         }
     
-    def _count_figures(self, placements: List[Dict]) -> Dict[str, int]:
-        """Подсчитывает количество каждого типа фигур в размещениях"""
-        figures_count = {}
-        for placement in placements:
-            fig = placement['figure']
-            fig_key = f"{fig.width}x{fig.height}"
-            figures_count[fig_key] = figures_count.get(fig_key, 0) + 1
-        return figures_count
+    def iter_containers(self, max_containers: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Упаковывает фигуры лист за листом из оставшейся потребности.
+        Каждый лист упаковывается в новое дерево и отдается сразу после заполнения,
+        в памяти хранится только дерево текущего листа
+        """
+        figures = self.figures
+        sheet_index = 0
+        
+        while figures and (max_containers is None or sheet_index < max_containers):
+            if self.rating is not None and sheet_index > 0:
+                self.rating.start_sheet()
+            result = self.pack_single_container(figures, PackingSession(self.container))
+            if not result['placements']:
+                # Оставшиеся фигуры не помещаются даже на пустой лист
+                break
+            
+            result['sheet_index'] = sheet_index
+            yield result
+            
+            figures = result['remaining_figures']
+            sheet_index += 1
     
     def _find_best_fit(self, figure: Figure) -> Optional[Dict]:
-        """Находит лучшую позицию для фигуры используя стратегию Best Area Fit"""
-        best_node = None
-        best_waste = float('inf')
-        
+        """Находит лучшую позицию для фигуры (по умолчанию стратегия Best Area Fit)"""
         fig_width, fig_height = figure.size_with_margin()
         
-        # Обходим все свободные узлы
-        nodes_to_check = [self.container.root]
-        while nodes_to_check:
-            node = nodes_to_check.pop()
-            
-            if node.used or node.width < fig_width or node.height < fig_height:
-                continue
-            
-            # Проверяем помещается ли фигура
-            if node.width >= fig_width and node.height >= fig_height:
-                waste = (node.width * node.height) - (fig_width * fig_height)
-                if waste < best_waste:
-                    best_waste = waste
-                    best_node = node
-            
-            # Добавляем дочерние узлы для проверки
-            if node.right:
-                nodes_to_check.append(node.right)
-            if node.down:
-                nodes_to_check.append(node.down)
+        if self.strategy.fit_rule == 'best_area':
+            # Свободный узел с наименьшими отходами берем из индекса
+            free_index = self.session.free_index
+            best_node = free_index.find_best_fit(fig_width, fig_height)
+            if self.metrics is not None:
+                self.metrics.increment('fit_searches')
+                self.metrics.increment('nodes_visited', free_index.last_scanned)
+        else:
+            best_node = self._find_best_fit_by_score(fig_width, fig_height)
+            if self.metrics is not None:
+                self.metrics.increment('fit_searches')
+                self.metrics.increment('nodes_visited', len(self.session.free_index))
         
         if best_node:
             return {
@@ -114,18 +187,73 @@ class GuillotinePacker:
             }
         return None
     
-    def _split_node(self, node: GuillotineNode, figure: Figure):
-        """Разделяет узел после размещения фигуры"""
+    def _find_best_fit_by_score(self, fig_width: int, fig_height: int) -> Optional[GuillotineNode]:
+        """Перебирает свободные узлы и выбирает лучший по правилу стратегии"""
+        fit_rule = self.strategy.fit_rule
+        best_node = None
+        best_score = None
+        
+        for node in self.session.free_index:
+            if node.width < fig_width or node.height < fig_height:
+                continue
+            
+            leftover_width = node.width - fig_width
+            leftover_height = node.height - fig_height
+            if fit_rule == 'best_short_side':
+                score = (min(leftover_width, leftover_height), max(leftover_width, leftover_height))
+            elif fit_rule == 'best_long_side':
+                score = (max(leftover_width, leftover_height), min(leftover_width, leftover_height))
+            else:
+                # bottom_left: самая нижняя, затем самая левая позиция
+                score = (node.y + fig_height, node.x)
+            
+            if best_score is None or score < best_score:
+                best_score = score
+                best_node = node
+        
+        return best_node
+    
+    def _place_block(self, placement: Dict, figure: Figure, remaining: int) -> Dict:
+        """Размещает в выбранном узле наибольший блок columns x rows одинаковых фигур"""
+        node = placement['node']
         fig_width, fig_height = figure.size_with_margin()
+        max_columns = min(node.width // fig_width, remaining)
+        max_rows = node.height // fig_height
+        
+        # Ищем блок с максимальным числом фигур, при равенстве - более широкий
+        columns, rows = 1, 1
+        for block_columns in range(1, max_columns + 1):
+            block_rows = min(max_rows, remaining // block_columns)
+            if block_columns * block_rows >= columns * rows:
+                columns, rows = block_columns, block_rows
+        
+        self._split_node(node, figure, columns, rows)
+        
+        return {
+            'figure': figure,
+            'x': placement['x'],
+            'y': placement['y'],
+            'rotated': placement['rotated'],
+            'columns': columns,
+            'rows': rows,
+            'count': columns * rows
+        }
+    
+    def _split_node(self, node: GuillotineNode, figure: Figure, columns: int = 1, rows: int = 1):
+        """Разделяет узел после размещения фигуры (или блока columns x rows фигур)"""
+        fig_width, fig_height = figure.size_with_margin()
+        fig_width *= columns
+        fig_height *= rows
         
         node.used = True
+        node.columns = columns
+        node.rows = rows
         
         # Определяем как разделять узел (вертикально или горизонтально)
         remaining_width = node.width - fig_width
         remaining_height = node.height - fig_height
         
-        # Стратегия: разделяем по большей стороне
-        if remaining_width >= remaining_height:
+        if self._split_vertically(node, fig_width, fig_height):
             # Вертикальное разделение
             if remaining_width > 0:
                 node.right = GuillotineNode(
@@ -148,4 +276,35 @@ class GuillotinePacker:
                 node.right = GuillotineNode(
                     node.x + fig_width, node.y,
                     remaining_width, fig_height
-                )
\ No newline at end of file
+                )
+        
+        # Узел занят - в индексе его заменяют дочерние узлы
+        self.session.free_index.split(node)
+        if self.rating is not None:
+            self.rating.on_split(node)
+        if self.metrics is not None:
+            self.metrics.increment('splits')
+    
+    def _split_vertically(self, node: GuillotineNode, fig_width: int, fig_height: int) -> bool:
+        """Определяет, делается ли первый разрез узла вертикальным"""
+        split_rule = self.strategy.split_rule
+        remaining_width = node.width - fig_width
+        remaining_height = node.height - fig_height
+        
+        if split_rule == 'longer_leftover':
+            # Разделяем по большей стороне
+            return remaining_width >= remaining_height
+        if split_rule == 'shorter_leftover':
+            return remaining_width < remaining_height
+        if split_rule == 'vertical':
+            return True
+        if split_rule == 'horizontal':
+            return False
+        
+        # min_area / max_area: сравниваем наибольший свободный прямоугольник
+        # после вертикального и горизонтального разреза
+        vertical_largest = max(remaining_width * node.height, fig_width * remaining_height)
+        horizontal_largest = max(node.width * remaining_height, remaining_width * fig_height)
+        if split_rule == 'min_area':
+            return vertical_largest <= horizontal_largest
+        return vertical_largest >= horizontal_largest
\ No newline at end of file
@@ -1,20 +1,70 @@
-from typing import List, Dict
+from typing import List, Dict, Iterator, Optional
+from concurrent.futures import Executor, as_completed, TimeoutError
 from entity.container import Container
 from entity.figure import Figure
-from service.guillotine_packer import GuillotinePacker
+from entity.part_type import PartType, merge_figures
+from service.guillotine_packer import PackingStrategy
+from service.anytime import AnytimeOptimizer
+from service.cutting_stock import CuttingStockService
+from service.engines import ENGINES, create_packer
+from service.layout_cache import LayoutCache
+from service.metrics import PackingMetrics, measure_phase
 import math
+import time
 
 class IndustrialCalcService:
-    def __init__(self, container: Container, figures: List[Figure]):
+    def __init__(self, container: Container, figures: List[Figure], bulk: bool = False,
+                 cache: Optional[LayoutCache] = None, strategy: Optional[PackingStrategy] = None,
+                 metrics: Optional[PackingMetrics] = None, engine: str = 'guillotine'):
         self.container = container
-        self.figures = figures
+        # Одинаковые детали объединяются заранее: план ведется по видам деталей
+        self.figures = merge_figures(figures)
+        self.bulk = bulk  # Блочное размещение одинаковых фигур
+        self.strategy = strategy or PackingStrategy()
+        # Общий кэш раскроев; без него план кэшируется в пределах сервиса
+        self.cache = cache if cache is not None else LayoutCache(max_entries=8)
+        # Инструментирование; метрики добавляются в результат под ключом 'metrics'
+        self.metrics = metrics
+        # Движок раскроя листа из service.engines.ENGINES
+        self.engine = engine
     
     def calculate_production_plan(self) -> Dict:
+        """
+        Рассчитывает производственный план с гильотинной упаковкой.
+        Повторный расчет той же задачи берется из кэша раскроев
+        """
+        with measure_phase(self.metrics, 'plan'):
+            production_plan = self._cached_production_plan()
+        
+        if self.metrics is not None:
+            self.metrics.flush()
+            return {**production_plan, 'metrics': self.metrics.as_dict()}
+        return production_plan
+    
+    def _cached_production_plan(self) -> Dict:
+        """Берет план из кэша раскроев или рассчитывает и кэширует его"""
+        key = production_plan_key(self.container, self.figures, self.bulk, self.strategy, self.engine)
+        production_plan = self.cache.get(key)
+        if self.metrics is not None:
+            self.metrics.increment('cache_hits' if production_plan is not None else 'cache_misses')
+        if production_plan is None:
+            production_plan = self.cache.put(key, self._calculate_production_plan())
+        return production_plan
+    
+    def _calculate_production_plan(self) -> Dict:
         """Рассчитывает производственный план с гильотинной упаковкой"""
         
         # Шаг 1: Находим оптимальную упаковку для одного листа
-        packer = GuillotinePacker(self.container, self.figures)
+        packer = create_packer(
+            self.engine, self.container, self.figures, bulk=self.bulk, strategy=self.strategy, metrics=self.metrics
+        )
         single_sheet_result = packer.pack_single_container()
+        # Снимок метрик не должен попадать в кэш раскроев
+        single_sheet_result.pop('metrics', None)
+        return self._plan_from_sheet(single_sheet_result)
+    
+    def _plan_from_sheet(self, single_sheet_result: Dict) -> Dict:
+        """Строит производственный план повторением раскроя одного листа"""
         
         # Шаг 2: Анализируем сколько каких фигур помещается на один лист
         figures_per_sheet = single_sheet_result['figures_count']
@@ -24,22 +74,21 @@ class IndustrialCalcService:
         production_plan = {}
         
         for figure in self.figures:
-            fig_key = f"{figure.width}x{figure.height}"
-            per_sheet = figures_per_sheet.get(fig_key, 0)
+            part_type = PartType.of(figure)
+            per_sheet = figures_per_sheet.get(part_type, 0)
             
             if per_sheet > 0:
                 sheets_for_figure = math.ceil(figure.necessary / per_sheet)
                 sheets_required = max(sheets_required, sheets_for_figure)
                 
-                production_plan[fig_key] = {
+                production_plan[part_type] = {
                     'necessary': figure.necessary,
                     'per_sheet': per_sheet,
-                    'sheets_needed': sheets_for_figure,
-                    'total_produced': per_sheet * sheets_required
+                    'sheets_needed': sheets_for_figure
                 }
             else:
                 # Если фигура не помещается на лист
-                production_plan[fig_key] = {
+                production_plan[part_type] = {
                     'necessary': figure.necessary,
                     'per_sheet': 0,
                     'sheets_needed': float('inf'),
@@ -47,6 +96,11 @@ class IndustrialCalcService:
                     'error': 'Не помещается на лист'
                 }
         
+        # Все виды режутся на одних и тех же листах
+        for part_plan in production_plan.values():
+            if part_plan['per_sheet'] > 0:
+                part_plan['total_produced'] = part_plan['per_sheet'] * sheets_required
+        
         # Если какие-то фигуры не помещаются, используем максимальное количество листов
         if sheets_required == 0:
             sheets_required = 1  # Минимум один лист
@@ -65,9 +119,137 @@ class IndustrialCalcService:
             'layout_coordinates': single_sheet_result['placements']  # Для визуализации
         }
     
+    def calculate_portfolio_plan(self, time_budget: float = 1.0,
+                                 strategies: Optional[List[PackingStrategy]] = None,
+                                 max_workers: Optional[int] = None,
+                                 executor: Optional[Executor] = None) -> Dict:
+        """
+        Перебирает комбинации эвристик упаковки в пуле процессов и возвращает
+        лучший план, найденный до истечения time_budget секунд.
+        Лучшим считается план с меньшим числом листов, затем с большей эффективностью листа.
+        Стратегии, не завершившиеся к сроку, отменяются или отбрасываются,
+        завершившиеся с ошибкой - пропускаются
+        """
+        deadline = time.monotonic() + time_budget
+        if strategies is None:
+            strategies = PackingStrategy.portfolio()
+        
+        # План текущей стратегии - гарантированный результат даже при нулевом бюджете
+        best_plan = self.calculate_production_plan()
+        best_strategy = self.strategy
+        
+        own_executor = executor is None
+        if own_executor:
+            # Импорт пула процессов заметно удлиняет запуск, поэтому он отложен до первого использования
+            from concurrent.futures import ProcessPoolExecutor
+            executor = ProcessPoolExecutor(max_workers=max_workers)
+        
+        # Стратегии, различающиеся только неиспользуемыми движком полями, дают один и тот же раскрой
+        strategy_fields = ENGINES[self.engine].STRATEGY_FIELDS
+        variants = {}
+        for strategy in strategies:
+            variants.setdefault(tuple(getattr(strategy, field) for field in strategy_fields), strategy)
+        variants.pop(tuple(getattr(self.strategy, field) for field in strategy_fields), None)
+        
+        futures = {
+            executor.submit(_plan_with_strategy, self.container, self.figures, self.bulk, strategy, self.engine): strategy
+            for strategy in variants.values()
+        }
+        # План текущей стратегии уже посчитан
+        strategies_evaluated = 1
+        try:
+            for future in as_completed(futures, timeout=max(0.0, deadline - time.monotonic())):
+                try:
+                    plan = future.result()
+                except Exception:
+                    # Сбой одной стратегии (или процесса пула) не прерывает перебор
+                    continue
+                strategies_evaluated += 1
+                if _is_better_plan(plan, best_plan):
+                    best_plan = plan
+                    best_strategy = futures[future]
+        except TimeoutError:
+            pass
+        finally:
+            for future in futures:
+                future.cancel()
+            if own_executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+        
+        return {
+            **best_plan,
+            'strategy': best_strategy,
+            'strategies_evaluated': strategies_evaluated
+        }
+    
+    def calculate_improved_plan(self, time_budget: Optional[float] = None,
+                                max_iterations: Optional[int] = None,
+                                seed: Optional[int] = None) -> Dict:
+        """
+        Улучшает жадный раскрой листа локальным поиском в пределах
+        time_budget секунд или max_iterations итераций и строит по нему план
+        """
+        if self.engine != 'guillotine':
+            raise ValueError('Локальный поиск реализован только для гильотинного движка')
+        optimizer = AnytimeOptimizer(
+            self.container, self.figures, bulk=self.bulk, strategy=self.strategy, seed=seed
+        )
+        best_sheet = optimizer.run(time_budget, max_iterations)
+        return {
+            **self._plan_from_sheet(best_sheet),
+            'iterations': optimizer.iterations
+        }
+    
+    def calculate_cutting_stock_plan(self, max_iterations: int = 10) -> Dict:
+        """
+        Рассчитывает план из нескольких схем листа с кратностями (схема x количество листов)
+        вместо повторения одной схемы: заказ покрывается без перепроизводства.
+        Повторный расчет той же задачи берется из кэша раскроев
+        """
+        key = LayoutCache.fingerprint(
+            self.container, self.figures, bulk=self.bulk, strategy=str(self.strategy),
+            engine=self.engine, operation='cutting_stock', max_iterations=max_iterations
+        )
+        plan = self.cache.get(key)
+        if plan is None:
+            with measure_phase(self.metrics, 'cutting_stock'):
+                service = CuttingStockService(
+                    self.container, self.figures, bulk=self.bulk, strategy=self.strategy,
+                    engine=self.engine, max_iterations=max_iterations
+                )
+                plan = self.cache.put(key, service.calculate_plan())
+        
+        if self.metrics is not None:
+            self.metrics.flush()
+            return {**plan, 'metrics': self.metrics.as_dict()}
+        return plan
+    
+    def iter_sheet_layouts(self, max_sheets: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Потоково упаковывает заказ лист за листом.
+        Каждый лист отдается сразу после упаковки, следующий лист
+        упаковывается из оставшихся фигур предыдущего
+        """
+        packer = create_packer(
+            self.engine, self.container, self.figures, bulk=self.bulk, strategy=self.strategy, metrics=self.metrics
+        )
+        yield from packer.iter_containers(max_sheets)
+    
     def generate_cutting_plan(self) -> Dict:
         """Генерирует план раскроя для производства"""
-        production_plan = self.calculate_production_plan()
+        with measure_phase(self.metrics, 'plan'):
+            production_plan = self._cached_production_plan()
+        
+        with measure_phase(self.metrics, 'cutting_plan'):
+            cutting_plan = self._build_cutting_plan(production_plan)
+        
+        if self.metrics is not None:
+            self.metrics.flush()
+            cutting_plan['metrics'] = self.metrics.as_dict()
+        return cutting_plan
+    
+    def _build_cutting_plan(self, production_plan: Dict) -> Dict:
+        """Собирает инструкции раскроя по раскрою одного листа"""
         
         cutting_plan = {
             'container_specs': {
@@ -84,6 +266,8 @@ class IndustrialCalcService:
             fig = placement['figure']
             instruction = {
                 'figure': f"{fig.width}x{fig.height}",
+                'part_type_id': PartType.of_placed(fig, placement['rotated']).id,
+                'rotation': fig.rotation,
                 'x': placement['x'],
                 'y': placement['y'],
                 'width': fig.width + fig.margin * 2,
@@ -118,4 +302,26 @@ class IndustrialCalcService:
             ],
             'production_summary': production_plan,
             'cutting_plan': self.generate_cutting_plan()
-        }
\ No newline at end of file
+        }
+
+def production_plan_key(container: Container, figures: List[Figure], bulk: bool,
+                        strategy: PackingStrategy, engine: str = 'guillotine') -> str:
+    """
+    Ключ кэша производственного плана. Общий для всех сервисов, кэширующих
+    calculate_production_plan: фигуры объединяются по видам так же, как в сервисе
+    """
+    return LayoutCache.fingerprint(
+        container, merge_figures(figures), bulk=bulk, strategy=str(strategy), engine=engine
+    )
+
+def _plan_with_strategy(container: Container, figures: List[Figure], bulk: bool,
+                        strategy: PackingStrategy, engine: str = 'guillotine') -> Dict:
+    """Рассчитывает план одной стратегией (выполняется в процессе пула)"""
+    return IndustrialCalcService(
+        container, figures, bulk=bulk, strategy=strategy, engine=engine
+    ).calculate_production_plan()
+
+def _is_better_plan(plan: Dict, best_plan: Dict) -> bool:
+    """Сравнивает планы: меньше листов, затем выше эффективность листа"""
+    return (plan['sheets_required'], -plan['single_sheet_layout']['efficiency']) < \
+        (best_plan['sheets_required'], -best_plan['single_sheet_layout']['efficiency'])
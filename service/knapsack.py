@@ -0,0 +1,524 @@
+from typing import List, Dict, Tuple, Optional
+from entity.container import Container
+from entity.figure import Figure
+from entity.layout import Layout
+from entity.part_type import PartType
+from service.guillotine_packer import GuillotinePacker
+from functools import reduce
+import math
+import numpy as np
+
+EMPTY, PIECE, VERTICAL_CUT, HORIZONTAL_CUT, CELL_COPY = -1, 0, 1, 2, 3
+
+class GuillotineKnapsackService:
+    """
+    Двумерный гильотинный рюкзак для одного листа.
+    Динамическое программирование по подпрямоугольникам (ширина, высота),
+    где размеры и позиции разрезов ограничены растровыми точками
+    (нормальными комбинациями размеров фигур), а все размеры
+    предварительно сокращены на их НОД. Таблица хранится в массиве NumPy.
+
+    Без ограничения спроса (bounded=False) решение точное. С ограничением
+    (bounded=True, по умолчанию) решение приближенное: для фигур, спрос которых
+    меньше вместимости листа, ячейки таблицы хранят и количества деталей,
+    комбинации, превышающие спрос, отбрасываются, а оставшиеся свободными
+    прямоугольники дозаполняются остатком спроса. Если весь спрос помещается
+    жадной гильотинной упаковкой, таблица не строится. Раскрой допустим по спросу,
+    но в общем случае не оптимален; 'proven_optimal' отмечает раскрой,
+    достигший верхней оценки
+    """
+    def __init__(self, container: Container, figures: List[Figure], bounded: bool = True,
+                 max_cells: int = 4_000_000):
+        self.container = container
+        self.figures = figures
+        self.bounded = bounded
+        self.max_cells = max_cells  # Защита от слишком больших таблиц
+
+    def solve(self) -> Dict:
+        width = self.container.width - 2 * self.container.margin
+        height = self.container.height - 2 * self.container.margin
+        layout = Layout()
+        figures_count = {}
+        used = [0] * len(self.figures)
+
+        placed, upper_bound_area = self._pack(self.figures, width, height)
+        for figure_index, figure, x, y, rotated in placed:
+            used[figure_index] += 1
+            layout.add(figure, self.container.margin + x, self.container.margin + y, rotated)
+
+        remaining_figures = []
+        for figure, count in zip(self.figures, used):
+            if count > 0:
+                part_type = PartType.of(figure)
+                figures_count[part_type] = figures_count.get(part_type, 0) + count
+            if count < figure.necessary:
+                remaining_figures.append(Figure(
+                    figure.width, figure.height,
+                    figure.necessary - count,
+                    figure.rotation, figure.margin
+                ))
+
+        used_area = layout.used_area
+        return {
+            'placements': layout,
+            'figures_count': figures_count,
+            'used_area': used_area,
+            'efficiency': used_area / self.container.area,
+            'remaining_figures': remaining_figures,
+            'upper_bound_area': upper_bound_area,
+            # Верхняя оценка достигнута - раскрой оптимален (без ограничения спроса - всегда)
+            'proven_optimal': used_area == upper_bound_area
+        }
+
+    def _pack(self, figures: List[Figure], width: int, height: int) -> Tuple[List[Tuple[int, Figure, int, int, bool]], int]:
+        """
+        Раскрой прямоугольника width x height: размещения (номер фигуры, фигура, x, y, повернута)
+        относительно его угла и верхняя оценка заполненной площади.
+        С ограничением спроса свободные прямоугольники раскроя дозаполняются
+        оставшимся спросом тем же методом
+        """
+        pieces = [
+            piece for piece in self._pieces(figures)
+            if piece[0] <= width and piece[1] <= height
+        ]
+        if not pieces:
+            return [], 0
+        if self.bounded:
+            placed = self._greedy_fit(figures, width, height)
+            if placed is not None:
+                return placed, sum(figure.area() * figure.necessary for figure in figures if figure.necessary > 0)
+
+        # Сокращаем размеры на НОД размеров фигур по каждой оси
+        width_gcd = reduce(math.gcd, (piece[0] for piece in pieces))
+        height_gcd = reduce(math.gcd, (piece[1] for piece in pieces))
+        widths = [piece[0] // width_gcd for piece in pieces]
+        heights = [piece[1] // height_gcd for piece in pieces]
+        raster_w, round_w = _raster_points(widths, width // width_gcd)
+        raster_h, round_h = _raster_points(heights, height // height_gcd)
+
+        if len(raster_w) * len(raster_h) > self.max_cells:
+            raise ValueError(
+                f"Таблица {len(raster_w)}x{len(raster_h)} превышает лимит {self.max_cells} ячеек"
+            )
+
+        values, kinds, args = self._solve_table(pieces, widths, heights, raster_w, round_w, raster_h, round_h)
+        upper_bound_area = int(values[-1, -1])
+
+        tracked = self._tracked_figures(figures, pieces, width, height)
+        if tracked:
+            upper_bound_area = min(upper_bound_area, sum(
+                figure.area() * figure.necessary for figure in figures if figure.necessary > 0
+            ))
+            values, kinds, args = self._solve_bounded_table(
+                figures, pieces, widths, heights, raster_w, round_w, raster_h, round_h, tracked
+            )
+
+        placed_pieces, free_rects = self._reconstruct(
+            kinds, args, pieces, raster_w, round_w, raster_h, round_h, width_gcd, height_gcd, width, height
+        )
+        placed = [
+            (pieces[piece_index][2], pieces[piece_index][3], x, y, pieces[piece_index][4])
+            for piece_index, x, y in placed_pieces
+        ]
+        if not tracked:
+            return placed, upper_bound_area
+
+        # Таблица хранит одно решение на ячейку, поэтому из-за спроса часть места
+        # может остаться пустой: дозаполняем свободные прямоугольники остатком спроса
+        remaining = [figure.necessary for figure in figures]
+        for figure_index, *_ in placed:
+            remaining[figure_index] -= 1
+        for rect_x, rect_y, rect_width, rect_height in sorted(free_rects, key=lambda rect: -rect[2] * rect[3]):
+            if not any(count > 0 for count in remaining):
+                break
+            demand = [
+                Figure(figure.width, figure.height, count, figure.rotation, figure.margin)
+                for figure, count in zip(figures, remaining)
+            ]
+            refill, _ = self._pack(demand, rect_width, rect_height)
+            for figure_index, figure, x, y, rotated in refill:
+                remaining[figure_index] -= 1
+                placed.append((figure_index, figure, rect_x + x, rect_y + y, rotated))
+        return placed, upper_bound_area
+
+    def _greedy_fit(self, figures: List[Figure], width: int, height: int) -> Optional[List[Tuple[int, Figure, int, int, bool]]]:
+        """
+        Весь спрос, уложенный жадной гильотинной упаковкой, или None, если он не поместился.
+        Такой раскрой достигает верхней оценки - площади спроса
+        """
+        demand = [figure for figure in figures if figure.necessary > 0]
+        if sum(figure.area() * figure.necessary for figure in demand) > width * height:
+            return None
+        result = GuillotinePacker(Container(width, height), demand).pack_single_container()
+        if result['remaining_figures']:
+            return None
+
+        # Номера фигур для каждого вида детали (одинаковые фигуры могут повторяться)
+        indices: Dict[PartType, List[int]] = {}
+        for index, figure in enumerate(figures):
+            indices.setdefault(PartType.of(figure), []).extend([index] * max(figure.necessary, 0))
+        return [
+            (indices[PartType.of_placed(placement['figure'], placement['rotated'])].pop(),
+             placement['figure'], placement['x'], placement['y'], placement['rotated'])
+            for placement in result['placements']
+        ]
+
+    def _pieces(self, figures: List[Figure]) -> List[Tuple[int, int, int, Figure, bool]]:
+        """Варианты размещения: (ширина, высота, номер фигуры, фигура, повернута)"""
+        pieces = []
+        for index, figure in enumerate(figures):
+            if self.bounded and figure.necessary <= 0:
+                continue
+            fig_width, fig_height = figure.size_with_margin()
+            pieces.append((fig_width, fig_height, index, figure, False))
+            if figure.rotation and fig_width != fig_height:
+                pieces.append((fig_height, fig_width, index, figure.rotated(), True))
+        return pieces
+
+    def _tracked_figures(self, figures: List[Figure], pieces, width: int, height: int) -> List[int]:
+        """
+        Номера фигур, спрос которых может ограничить раскрой: меньше,
+        чем деталей этой фигуры помещается в прямоугольник по площади
+        """
+        if not self.bounded:
+            return []
+        tracked = set()
+        for piece_width, piece_height, figure_index, _, _ in pieces:
+            if figures[figure_index].necessary < (width * height) // (piece_width * piece_height):
+                tracked.add(figure_index)
+        return sorted(tracked)
+
+    def _solve_table(self, pieces, widths, heights, raster_w, round_w, raster_h, round_h):
+        """
+        Заполняет таблицу values[i, j] - наибольшая площадь деталей в прямоугольнике
+        raster_w[i] x raster_h[j]. Разрез и остаток ячейки меньше нее хотя бы на
+        наименьший размер детали по оси, поэтому таблица считается за один проход
+        по блокам (полоса ширин x полоса высот, _raster_bands): разрезы ячеек блока
+        используют только окончательные ячейки предыдущих блоков
+        """
+        count_w, count_h = len(raster_w), len(raster_h)
+        values = np.zeros((count_w, count_h), dtype=np.int32)
+        kinds = np.full((count_w, count_h), EMPTY, dtype=np.int8)
+        args = np.zeros((count_w, count_h), dtype=np.int32)
+
+        # Одна деталь в прямоугольнике: наибольшая по площади из помещающихся
+        for piece_index, (piece, piece_width, piece_height) in enumerate(zip(pieces, widths, heights)):
+            area = piece[0] * piece[1]
+            fits = (raster_w >= piece_width)[:, None] & (raster_h >= piece_height)[None, :]
+            better = fits & (area > values)
+            values[better] = area
+            kinds[better] = PIECE
+            args[better] = piece_index
+
+        height_bands = _raster_bands(raster_h, round_h, min(heights))
+        for row_start, row_end, cuts_w, rests_w in _raster_bands(raster_w, round_w, min(widths)):
+            rows = slice(row_start, row_end)
+            for column_start, column_end, cuts_h, rests_h in height_bands:
+                columns = slice(column_start, column_end)
+                tile_values = values[rows, columns]
+
+                # Вертикальные разрезы: левая часть x, правая <p - x> - строки выше полосы.
+                # Пустые ячейки (сторожевая строка -1) дают отрицательную сумму
+                if cuts_w.shape[1]:
+                    extended = np.concatenate([
+                        values[:row_start, columns], np.full((1, column_end - column_start), -1, dtype=np.int32)
+                    ])
+                    combined = extended[cuts_w] + extended[rests_w]
+                    best = combined.argmax(axis=1)[:, None, :]
+                    candidate = np.take_along_axis(combined, best, axis=1)[:, 0]
+                    better = candidate > tile_values
+                    tile_values[better] = candidate[better]
+                    kinds[rows, columns][better] = VERTICAL_CUT
+                    args[rows, columns][better] = np.take_along_axis(cuts_w, best[:, 0], axis=1)[better]
+
+                # Горизонтальные разрезы: нижняя часть y, верхняя <q - y> - столбцы ниже полосы
+                if cuts_h.shape[1]:
+                    extended = np.concatenate([
+                        values[rows, :column_start], np.full((row_end - row_start, 1), -1, dtype=np.int32)
+                    ], axis=1)
+                    combined = extended[:, cuts_h] + extended[:, rests_h]
+                    best = combined.argmax(axis=2)
+                    candidate = np.take_along_axis(combined, best[..., None], axis=2)[..., 0]
+                    better = candidate > tile_values
+                    tile_values[better] = candidate[better]
+                    kinds[rows, columns][better] = HORIZONTAL_CUT
+                    args[rows, columns][better] = cuts_h[np.arange(column_end - column_start)[None, :], best][better]
+
+        return values, kinds, args
+
+    def _solve_bounded_table(self, figures: List[Figure], pieces, widths, heights,
+                             raster_w, round_w, raster_h, round_h, tracked: List[int]):
+        """
+        Таблица с ограничением спроса: counts[i, j] - количества деталей отслеживаемых
+        фигур в решении ячейки, упакованные в битовые поля (_count_fields). Комбинация
+        двух частей допустима, только если суммарные количества не превышают спрос.
+        Ячейка также может повторить решение меньшей ячейки (CELL_COPY, args - плоский
+        индекс ячейки): без этого при недопустимых комбинациях большой прямоугольник
+        оказался бы хуже вложенного.
+
+        Разрез и остаток ячейки меньше нее хотя бы на наименьший размер детали по оси,
+        поэтому таблица считается за один проход по блокам (полоса ширин x полоса высот,
+        _raster_bands): ячейки блока опираются только на окончательные ячейки
+        предыдущих блоков, и количества ячейки не меняются после того, как на нее сослались.
+        В ячейке хранится одно решение, поэтому результат эвристический; из решений
+        равной площади выбирается расходующее меньшую долю спроса (оценка scores
+        меньше площади на эту долю, деленную на число отслеживаемых фигур + 1;
+        оценка аддитивна, и оценка комбинации - сумма оценок частей)
+        """
+        count_w, count_h = len(raster_w), len(raster_h)
+        demand = [figures[index].necessary for index in tracked]
+        fields, offsets, guards = _count_fields(demand)
+        tracked_field = {figure_index: field for figure_index, field in zip(tracked, fields)}
+        values = np.zeros((count_w, count_h), dtype=np.int32)
+        scores = np.zeros((count_w, count_h), dtype=np.float64)
+        kinds = np.full((count_w, count_h), EMPTY, dtype=np.int8)
+        args = np.zeros((count_w, count_h), dtype=np.int32)
+        counts = np.zeros((count_w, count_h, len(offsets)), dtype=np.int64)
+        cells = np.arange(count_w * count_h, dtype=np.int32).reshape(count_w, count_h)
+
+        for piece_index, (piece, piece_width, piece_height) in enumerate(zip(pieces, widths, heights)):
+            area = piece[0] * piece[1]
+            field = tracked_field.get(piece[2])
+            score = area - 1.0 / (figures[piece[2]].necessary * (len(tracked) + 1)) if field is not None else area
+            fits = (raster_w >= piece_width)[:, None] & (raster_h >= piece_height)[None, :]
+            better = fits & (score > scores)
+            values[better] = area
+            scores[better] = score
+            kinds[better] = PIECE
+            args[better] = piece_index
+            counts[better] = 0
+            if field is not None:
+                word, shift = field
+                counts[better, word] = 1 << shift
+
+        def combine(part_scores, rest_scores, combined_counts):
+            """Оценки комбинаций двух частей; недопустимые по спросу - отрицательные"""
+            feasible = (((combined_counts + offsets) & guards) == 0).all(axis=-1)
+            return np.where(feasible, part_scores + rest_scores, -1.0)
+
+        def sources(rows, columns):
+            """Плоские индексы ячеек, решения которых хранят ячейки (копии ссылаются на источник)"""
+            return np.where(kinds[rows, columns] == CELL_COPY, args[rows, columns], cells[rows, columns])
+
+        height_bands = _raster_bands(raster_h, round_h, min(heights))
+        for row_start, row_end, cuts_w, rests_w in _raster_bands(raster_w, round_w, min(widths)):
+            rows = slice(row_start, row_end)
+            for column_start, column_end, cuts_h, rests_h in height_bands:
+                columns = slice(column_start, column_end)
+                tile_values = values[rows, columns]
+                tile_scores = scores[rows, columns]
+                tile_kinds = kinds[rows, columns]
+                tile_args = args[rows, columns]
+                tile_counts = counts[rows, columns]
+
+                # Вертикальные разрезы: части - ячейки тех же высот в строках выше полосы.
+                # Пустые ячейки разреза указывают на сторожевую строку с индексом row_start
+                if cuts_w.shape[1]:
+                    extended = np.concatenate([scores[:row_start, columns], np.full((1, column_end - column_start), -1.0)])
+                    extended_values = values[:row_start + 1, columns]
+                    extended_counts = np.concatenate([
+                        counts[:row_start, columns], np.zeros((1, column_end - column_start, len(offsets)), dtype=np.int64)
+                    ])
+                    combined_counts = extended_counts[cuts_w] + extended_counts[rests_w]
+                    combined = combine(extended[cuts_w], extended[rests_w], combined_counts)
+                    best = combined.argmax(axis=1)[:, None, :]
+                    candidate = np.take_along_axis(combined, best, axis=1)[:, 0]
+                    better = candidate > tile_scores
+                    cut_rows = np.take_along_axis(cuts_w, best[:, 0], axis=1)
+                    rest_rows = np.take_along_axis(rests_w, best[:, 0], axis=1)
+                    column_index = np.arange(column_end - column_start)[None, :]
+                    tile_values[better] = (extended_values[cut_rows, column_index] + extended_values[rest_rows, column_index])[better]
+                    tile_scores[better] = candidate[better]
+                    tile_kinds[better] = VERTICAL_CUT
+                    tile_args[better] = cut_rows[better]
+                    tile_counts[better] = np.take_along_axis(combined_counts, best[..., None], axis=1)[:, 0][better]
+
+                # Горизонтальные разрезы: части - ячейки тех же ширин в столбцах ниже полосы
+                if cuts_h.shape[1]:
+                    extended = np.concatenate([scores[rows, :column_start], np.full((row_end - row_start, 1), -1.0)], axis=1)
+                    extended_values = values[rows, :column_start + 1]
+                    extended_counts = np.concatenate([
+                        counts[rows, :column_start], np.zeros((row_end - row_start, 1, len(offsets)), dtype=np.int64)
+                    ], axis=1)
+                    combined_counts = extended_counts[:, cuts_h] + extended_counts[:, rests_h]
+                    combined = combine(extended[:, cuts_h], extended[:, rests_h], combined_counts)
+                    best = combined.argmax(axis=2)[..., None]
+                    candidate = np.take_along_axis(combined, best, axis=2)[..., 0]
+                    better = candidate > tile_scores
+                    cut_columns = cuts_h[np.arange(column_end - column_start)[None, :], best[..., 0]]
+                    rest_columns = rests_h[np.arange(column_end - column_start)[None, :], best[..., 0]]
+                    row_index = np.arange(row_end - row_start)[:, None]
+                    tile_values[better] = (extended_values[row_index, cut_columns] + extended_values[row_index, rest_columns])[better]
+                    tile_scores[better] = candidate[better]
+                    tile_kinds[better] = HORIZONTAL_CUT
+                    tile_args[better] = cut_columns[better]
+                    tile_counts[better] = np.take_along_axis(combined_counts, best[..., None], axis=2)[..., 0, :][better]
+
+                # Повторение меньшей ячейки: лучшая оценка среди ячеек не шире и не выше.
+                # Сначала по высотам (с окончательным столбцом слева), затем по ширинам
+                # (с окончательной строкой снизу)
+                left = np.full((row_end - row_start, 1), -1.0)
+                left_source = np.zeros((row_end - row_start, 1), dtype=np.int32)
+                if column_start > 0:
+                    left[:, 0] = scores[rows, column_start - 1]
+                    left_source[:, 0] = sources(rows, column_start - 1)
+                best_scores, best_sources = _running_best(
+                    np.concatenate([left, tile_scores], axis=1),
+                    np.concatenate([left_source, cells[rows, columns]], axis=1), axis=1
+                )
+                bottom = np.full((1, column_end - column_start), -1.0)
+                bottom_source = np.zeros((1, column_end - column_start), dtype=np.int32)
+                if row_start > 0:
+                    bottom[0] = scores[row_start - 1, columns]
+                    bottom_source[0] = sources(row_start - 1, columns)
+                best_scores, best_sources = _running_best(
+                    np.concatenate([bottom, best_scores[:, 1:]]),
+                    np.concatenate([bottom_source, best_sources[:, 1:]]), axis=0
+                )
+                copied = best_scores[1:] > tile_scores
+                copy_source = best_sources[1:][copied]
+                tile_values[copied] = values.ravel()[copy_source]
+                tile_scores[copied] = scores.ravel()[copy_source]
+                tile_kinds[copied] = CELL_COPY
+                tile_args[copied] = copy_source
+                tile_counts[copied] = counts.reshape(-1, len(offsets))[copy_source]
+
+        return values, kinds, args
+
+    def _reconstruct(self, kinds, args, pieces, raster_w, round_w, raster_h, round_h, width_gcd: int,
+                     height_gcd: int, width: int, height: int) -> Tuple[List[Tuple[int, int, int]], List[Tuple[int, int, int, int]]]:
+        """
+        Восстанавливает размещения (номер варианта, x, y) и свободные прямоугольники
+        (x, y, ширина, высота) в исходных единицах. Узел обхода - ячейка таблицы
+        и доступное ей место, которое может быть больше ячейки
+        """
+        placed = []
+        free_rects = []
+        stack = [(len(raster_w) - 1, len(raster_h) - 1, 0, 0, width, height)]
+        while stack:
+            i, j, x, y, available_w, available_h = stack.pop()
+            node_w, node_h = int(raster_w[i]) * width_gcd, int(raster_h[j]) * height_gcd
+            # Полосы доступного места справа и сверху от ячейки
+            free_rects.append((x + node_w, y, available_w - node_w, available_h))
+            free_rects.append((x, y + node_h, node_w, available_h - node_h))
+
+            kind = kinds[i, j]
+            if kind == PIECE:
+                piece_index = int(args[i, j])
+                piece_width, piece_height = pieces[piece_index][:2]
+                placed.append((piece_index, x, y))
+                free_rects.append((x + piece_width, y, node_w - piece_width, node_h))
+                free_rects.append((x, y + piece_height, piece_width, node_h - piece_height))
+            elif kind == VERTICAL_CUT:
+                cut = int(args[i, j])
+                rest = int(round_w[raster_w[i] - raster_w[cut]])
+                left_w = int(raster_w[cut]) * width_gcd
+                stack.append((rest, j, x + left_w, y, node_w - left_w, node_h))
+                stack.append((cut, j, x, y, left_w, node_h))
+            elif kind == HORIZONTAL_CUT:
+                cut = int(args[i, j])
+                rest = int(round_h[raster_h[j] - raster_h[cut]])
+                bottom_h = int(raster_h[cut]) * height_gcd
+                stack.append((i, rest, x, y + bottom_h, node_w, node_h - bottom_h))
+                stack.append((i, cut, x, y, node_w, bottom_h))
+            elif kind == CELL_COPY:
+                source_i, source_j = divmod(int(args[i, j]), len(raster_h))
+                stack.append((source_i, source_j, x, y, node_w, node_h))
+            else:
+                free_rects.append((x, y, node_w, node_h))
+        return placed, [rect for rect in free_rects if rect[2] > 0 and rect[3] > 0]
+
+def _raster_points(sizes: List[int], limit: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Растровые точки размера limit: {<limit - n>}, где n - нормальные точки
+    (суммы размеров деталей не больше limit), а <z> - наибольшая нормальная точка <= z.
+    Возвращает массив растровых точек и таблицу z -> индекс наибольшей растровой точки <= z
+    """
+    normal = np.zeros(limit + 1, dtype=bool)
+    normal[0] = True
+    for size in sorted(set(sizes)):
+        for start in range(size, limit + 1):
+            if normal[start - size]:
+                normal[start] = True
+
+    positions = np.arange(limit + 1)
+    round_normal = np.maximum.accumulate(np.where(normal, positions, 0))
+    raster = np.zeros(limit + 1, dtype=bool)
+    raster[round_normal[limit - positions[normal]]] = True
+
+    raster_points = positions[raster]
+    round_raster = np.maximum.accumulate(np.where(raster, np.cumsum(raster) - 1, 0))
+    return raster_points, round_raster
+
+def _cut_tables(raster_points: np.ndarray, round_raster: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Для каждой растровой точки q - индексы позиций разреза y (0 < y <= q / 2)
+    и индексы остатков <q - y>. Пустые ячейки заполнены -1
+    """
+    count = len(raster_points)
+    max_cuts = int(np.searchsorted(raster_points, raster_points[-1] // 2, side='right'))
+    cut_index = np.arange(max_cuts)
+    valid = (raster_points[cut_index][None, :] > 0) & (2 * raster_points[cut_index][None, :] <= raster_points[:, None])
+    cuts = np.where(valid, cut_index[None, :], -1)
+    rests = np.where(
+        valid,
+        round_raster[np.clip(raster_points[:, None] - raster_points[cut_index][None, :], 0, None)],
+        -1
+    )
+    return cuts.astype(np.int64), rests.astype(np.int64)
+
+def _count_fields(demand: List[int]) -> Tuple[List[Tuple[int, int]], np.ndarray, np.ndarray]:
+    """
+    Битовые поля количеств деталей в словах int64: поле фигуры со спросом d занимает
+    d.bit_length() + 1 бит. Сумма двух допустимых количеств (не больше 2d) не выходит
+    за поле, а прибавление смещения 2^(w-1) - 1 - d переносит превышение спроса
+    в старший бит поля. Возвращает (слово, сдвиг) каждой фигуры, смещения и маски
+    старших битов по словам
+    """
+    fields = []
+    offsets, guards = [0], [0]
+    shift = 0
+    for necessary in demand:
+        width = necessary.bit_length() + 1
+        if shift + width > 62:
+            offsets.append(0)
+            guards.append(0)
+            shift = 0
+        fields.append((len(offsets) - 1, shift))
+        offsets[-1] += ((1 << (width - 1)) - 1 - necessary) << shift
+        guards[-1] |= 1 << (shift + width - 1)
+        shift += width
+    return fields, np.array(offsets, dtype=np.int64), np.array(guards, dtype=np.int64)
+
+def _raster_bands(raster_points: np.ndarray, round_raster: np.ndarray,
+                  step: int) -> List[Tuple[int, int, np.ndarray, np.ndarray]]:
+    """
+    Полосы растровых точек [q, q + step), где step - наименьший размер детали по оси.
+    Разрез и остаток ячейки меньше нее хотя бы на step, поэтому ячейки полосы опираются
+    только на ячейки ниже полосы. Для полосы возвращает (начало, конец, разрезы, остатки);
+    пустые ячейки разреза указывают на индекс начала полосы
+    """
+    cuts, rests = _cut_tables(raster_points, round_raster)
+    bands = []
+    start = 0
+    while start < len(raster_points):
+        end = int(np.searchsorted(raster_points, raster_points[start] + step, side='left'))
+        valid = cuts[start:end] >= 0
+        used = np.flatnonzero(valid.any(axis=0))
+        columns = int(used[-1]) + 1 if len(used) else 0
+        bands.append((
+            start, end,
+            np.where(valid[:, :columns], cuts[start:end, :columns], start),
+            np.where(valid[:, :columns], rests[start:end, :columns], start)
+        ))
+        start = end
+    return bands
+
+def _running_best(scores: np.ndarray, sources: np.ndarray, axis: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Накопленный максимум оценок вдоль оси и источник, на котором он достигнут"""
+    running = np.maximum.accumulate(scores, axis=axis)
+    shape = [1, 1]
+    shape[axis] = scores.shape[axis]
+    positions = np.arange(scores.shape[axis]).reshape(shape)
+    last = np.maximum.accumulate(np.where(scores == running, positions, 0), axis=axis)
+    return running, np.take_along_axis(sources, last, axis=axis)
@@ -0,0 +1,113 @@
+from typing import List, Dict, Optional
+from collections import OrderedDict
+from entity.container import Container
+from entity.figure import Figure
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+
+# Версия формата сохраняемых раскроев и планов. Входит в ключ кэша:
+# увеличивается при каждом изменении схемы результата, чтобы кэш на диске,
+# записанный прежним кодом, не отдавался новому
+CACHE_FORMAT = 4
+
+class LayoutCache:
+    """
+    Кэш рассчитанных раскроев с вытеснением LRU в памяти
+    и необязательным хранением на локальном диске.
+    Ключ - отпечаток размеров листа, отступов и мультимножества фигур
+    """
+    def __init__(self, max_entries: int = 256, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.path = path  # Каталог для хранения раскроев на диске
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._lock = threading.Lock()
+
+        if self.path:
+            os.makedirs(self.path, exist_ok=True)
+
+    @staticmethod
+    def fingerprint(container: Container, figures: List[Figure], **options) -> str:
+        """Строит канонический отпечаток задачи раскроя"""
+        figures_key = sorted(
+            (fig.width, fig.height, fig.necessary, fig.rotation, fig.margin)
+            for fig in figures
+        )
+        key = (
+            CACHE_FORMAT,
+            (container.width, container.height, container.margin),
+            tuple(figures_key),
+            tuple(sorted(options.items()))
+        )
+        return hashlib.sha256(repr(key).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Возвращает раскрой из кэша или None"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+        value = self._load(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store(key, value)
+        return value
+
+    def put(self, key: str, value: Dict) -> Dict:
+        """
+        Сохраняет раскрой в кэш. Возвращает сохраненное значение,
+        которое разделяется между всеми получателями и не должно изменяться
+        """
+        with self._lock:
+            self._store(key, value)
+        self._save(key, value)
+        return value
+
+    def clear(self):
+        """Очищает кэш в памяти (файлы на диске сохраняются)"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _store(self, key: str, value: Dict):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _file_path(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.pickle")
+
+    def _load(self, key: str) -> Optional[Dict]:
+        if not self.path:
+            return None
+        try:
+            with open(self._file_path(key), 'rb') as file:
+                return pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _save(self, key: str, value: Dict):
+        if not self.path:
+            return
+        # Пишем во временный файл и атомарно переименовываем
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._file_path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
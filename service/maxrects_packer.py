@@ -0,0 +1,121 @@
+from typing import List, Dict, Tuple, Optional
+from entity.figure import Figure
+from entity.layout import Layout
+from service.packer import Packer
+
+# Свободный прямоугольник: (x, y, ширина, высота)
+Rect = Tuple[int, int, int, int]
+
+class MaxRectsPacker(Packer):
+    """
+    Упаковка MaxRects: свободное место хранится как набор максимальных
+    (возможно пересекающихся) свободных прямоугольников. Деталь ставится
+    по правилу Best Short Side Fit, после размещения пересекающиеся
+    прямоугольники разрезаются, а вложенные в другие - отбрасываются.
+    Раскрой в общем случае не гильотинный: подходит для лазерной и плазменной резки
+    """
+    STRATEGY_FIELDS = ('sort_key',)
+
+    def _pack_sorted(self, sorted_figures: List[Figure]) -> Dict:
+        margin = self.container.margin
+        self.free_rects: List[Rect] = [(
+            margin, margin,
+            self.container.width - 2 * margin,
+            self.container.height - 2 * margin
+        )]
+        placements = Layout()
+        remaining_figures = []
+
+        for figure in sorted_figures:
+            placed_count = 0
+            rotated_figure = figure.rotated() if figure.rotation else None
+            while placed_count < figure.necessary:
+                placement = self._find_position(figure, rotated_figure)
+                if placement is None:
+                    # Свободное место только уменьшается - фигура этого типа больше не поместится
+                    break
+                placed_figure, x, y = placement
+                placements.add(placed_figure, x, y, placed_figure is rotated_figure)
+                self._place(x, y, *placed_figure.size_with_margin())
+                placed_count += 1
+
+            if placed_count < figure.necessary:
+                remaining_figures.append(Figure(
+                    figure.width, figure.height,
+                    figure.necessary - placed_count,
+                    figure.rotation, figure.margin
+                ))
+
+        return self._result(placements, remaining_figures)
+
+    def _record_gauges(self):
+        self.metrics.gauge('free_rects', len(self.free_rects))
+
+    def _find_position(self, figure: Figure, rotated_figure: Optional[Figure]) -> Optional[Tuple[Figure, int, int]]:
+        """Лучшая позиция по короткой, затем длинной стороне остатка среди обеих ориентаций"""
+        if self.metrics is not None:
+            self.metrics.increment('fit_searches')
+            self.metrics.increment('nodes_visited', len(self.free_rects))
+        best = None
+        best_score = None
+        for candidate in (figure, rotated_figure):
+            if candidate is None:
+                continue
+            fig_width, fig_height = candidate.size_with_margin()
+            for x, y, width, height in self.free_rects:
+                if width < fig_width or height < fig_height:
+                    continue
+                leftover_width = width - fig_width
+                leftover_height = height - fig_height
+                score = (min(leftover_width, leftover_height), max(leftover_width, leftover_height), y, x)
+                if best_score is None or score < best_score:
+                    best_score = score
+                    best = (candidate, x, y)
+        return best
+
+    def _place(self, x: int, y: int, width: int, height: int):
+        """Разрезает свободные прямоугольники, пересекающие деталь, и удаляет вложенные"""
+        right, bottom = x + width, y + height
+        kept: List[Rect] = []
+        touching: List[Rect] = []
+        new_rects: List[Rect] = []
+        for rect in self.free_rects:
+            rect_x, rect_y, rect_width, rect_height = rect
+            rect_right, rect_bottom = rect_x + rect_width, rect_y + rect_height
+            if x >= rect_right or right <= rect_x or y >= rect_bottom or bottom <= rect_y:
+                kept.append(rect)
+                if x <= rect_right and right >= rect_x and y <= rect_bottom and bottom >= rect_y:
+                    touching.append(rect)
+                continue
+            # До четырех максимальных остатков вокруг детали
+            if x > rect_x:
+                new_rects.append((rect_x, rect_y, x - rect_x, rect_height))
+            if right < rect_right:
+                new_rects.append((right, rect_y, rect_right - right, rect_height))
+            if y > rect_y:
+                new_rects.append((rect_x, rect_y, rect_width, y - rect_y))
+            if bottom < rect_bottom:
+                new_rects.append((rect_x, bottom, rect_width, rect_bottom - bottom))
+
+        # Прежние прямоугольники не вложены друг в друга и не могут оказаться внутри новых
+        # (новые - части удаленных). Новый остаток примыкает к детали, поэтому вместить
+        # его может только прежний прямоугольник, касающийся детали
+        unique_rects = []
+        for index, rect in enumerate(new_rects):
+            if any(_contains(other, rect) for other in touching):
+                continue
+            if any(
+                _contains(other, rect) and (other != rect or other_index < index)
+                for other_index, other in enumerate(new_rects)
+                if other_index != index
+            ):
+                continue
+            unique_rects.append(rect)
+        kept.extend(unique_rects)
+        self.free_rects = kept
+        if self.metrics is not None:
+            self.metrics.increment('splits')
+
+def _contains(outer: Rect, inner: Rect) -> bool:
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and \
+        outer[0] + outer[2] >= inner[0] + inner[2] and outer[1] + outer[3] >= inner[1] + inner[3]
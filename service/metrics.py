@@ -0,0 +1,52 @@
+from typing import Dict, Callable, Optional, ContextManager
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+import time
+
+class PackingMetrics:
+    """
+    Счетчики, замеры времени фаз и показатели дерева упаковки.
+    Передается в GuillotinePacker и IndustrialCalcService; без него
+    инструментирование отключено и почти ничего не стоит
+    """
+    def __init__(self, sink: Optional[Callable[[Dict], None]] = None):
+        self.sink = sink  # Получатель снимка метрик (логгер, экспорт в мониторинг)
+        self.counters: Counter = Counter()
+        self.timings: Dict[str, float] = {}
+        self.gauges: Dict[str, int] = {}
+
+    def increment(self, name: str, value: int = 1):
+        self.counters[name] += value
+
+    def gauge(self, name: str, value: int):
+        self.gauges[name] = value
+
+    def add_time(self, name: str, seconds: float):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str):
+        """Замеряет время фазы; повторные замеры суммируются"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    def as_dict(self) -> Dict:
+        return {
+            'counters': dict(self.counters),
+            'timings': dict(self.timings),
+            'gauges': dict(self.gauges)
+        }
+
+    def flush(self):
+        """Передает снимок метрик получателю, если он задан"""
+        if self.sink is not None:
+            self.sink(self.as_dict())
+
+def measure_phase(metrics: Optional[PackingMetrics], name: str) -> ContextManager:
+    """Контекст замера фазы, пустой при отключенных метриках"""
+    if metrics is None:
+        return nullcontext()
+    return metrics.phase(name)
@@ -0,0 +1,129 @@
+from typing import List, Dict, Optional, Iterator
+from entity.container import Container
+from entity.figure import Figure
+from entity.layout import Layout
+from entity.part_type import PartType
+from service.metrics import PackingMetrics, measure_phase
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+import itertools
+
+# Ключи сортировки фигур (сортировка по убыванию)
+SORT_KEYS = {
+    'area': lambda fig: fig.area(),
+    'max_side': lambda fig: max(fig.size_with_margin()),
+    'perimeter': lambda fig: sum(fig.size_with_margin()),
+    'width': lambda fig: fig.size_with_margin()[0],
+    'height': lambda fig: fig.size_with_margin()[1],
+}
+
+# Правила выбора свободного узла
+FIT_RULES = ('best_area', 'best_short_side', 'best_long_side', 'bottom_left')
+
+# Правила выбора направления первого разреза узла
+SPLIT_RULES = ('longer_leftover', 'shorter_leftover', 'horizontal', 'vertical', 'min_area', 'max_area')
+
+@dataclass(frozen=True)
+class PackingStrategy:
+    """Комбинация эвристик гильотинной упаковки"""
+    sort_key: str = 'area'
+    fit_rule: str = 'best_area'
+    split_rule: str = 'longer_leftover'
+    
+    @classmethod
+    def portfolio(cls) -> List['PackingStrategy']:
+        """Возвращает все комбинации сортировки, выбора узла и разреза"""
+        return [
+            cls(sort_key, fit_rule, split_rule)
+            for sort_key, fit_rule, split_rule in itertools.product(SORT_KEYS, FIT_RULES, SPLIT_RULES)
+        ]
+    
+    def __str__(self) -> str:
+        return f"{self.sort_key}/{self.fit_rule}/{self.split_rule}"
+
+class Packer(ABC):
+    """
+    Общий интерфейс движков раскроя листа. Все движки возвращают результат
+    одной схемы: placements (Layout), placement_groups, figures_count,
+    used_area, efficiency, remaining_figures
+    """
+    # Поля PackingStrategy, которые влияют на раскрой движка. Правила выбора узла
+    # и разреза относятся к гильотинному дереву; движки без него задают ('sort_key',)
+    STRATEGY_FIELDS = ('sort_key', 'fit_rule', 'split_rule')
+    
+    def __init__(self, container: Container, figures: List[Figure], bulk: bool = False,
+                 strategy: Optional[PackingStrategy] = None, metrics: Optional[PackingMetrics] = None):
+        self.container = container
+        self.figures = figures
+        self.bulk = bulk  # Размещать одинаковые фигуры блоками (если движок это поддерживает)
+        self.strategy = strategy or PackingStrategy()
+        self.metrics = metrics  # Инструментирование горячих участков (None - отключено)
+    
+    def pack_single_container(self, figures: Optional[List[Figure]] = None) -> Dict:
+        """Упаковывает фигуры в один пустой лист в порядке сортировки стратегии"""
+        if figures is None:
+            figures = self.figures
+        with measure_phase(self.metrics, 'sort'):
+            sorted_figures = self.sort_figures(figures)
+        return self.pack_in_order(sorted_figures)
+    
+    def pack_in_order(self, figures: List[Figure]) -> Dict:
+        """Упаковывает фигуры в один пустой лист в заданном порядке, без сортировки"""
+        with measure_phase(self.metrics, 'pack'):
+            result = self._pack_sorted(figures)
+        if self.metrics is not None:
+            self._record_gauges()
+            result['metrics'] = self.metrics.as_dict()
+        return result
+    
+    @abstractmethod
+    def _pack_sorted(self, sorted_figures: List[Figure]) -> Dict:
+        """Размещает фигуры в заданном порядке на пустом листе"""
+    
+    def _record_gauges(self):
+        """Записывает в метрики размеры структур движка после упаковки"""
+    
+    def iter_containers(self, max_containers: Optional[int] = None) -> Iterator[Dict]:
+        """Упаковывает фигуры лист за листом из оставшейся потребности"""
+        figures = self.figures
+        sheet_index = 0
+        
+        while figures and (max_containers is None or sheet_index < max_containers):
+            result = self.pack_single_container(figures)
+            if not result['placements']:
+                # Оставшиеся фигуры не помещаются даже на пустой лист
+                break
+            
+            result['sheet_index'] = sheet_index
+            yield result
+            
+            figures = result['remaining_figures']
+            sheet_index += 1
+    
+    def sort_figures(self, figures: List[Figure]) -> List[Figure]:
+        """
+        Сортирует фигуры по убыванию ключа стратегии (по умолчанию площади),
+        равные по ключу - по размерам, чтобы раскрой не зависел от порядка фигур
+        """
+        sort_key = SORT_KEYS[self.strategy.sort_key]
+        return sorted(
+            figures,
+            key=lambda x: (sort_key(x), x.width, x.height, x.margin, x.rotation, x.necessary),
+            reverse=True
+        )
+    
+    def _count_figures(self, placements: Layout) -> Dict[PartType, int]:
+        """Подсчитывает количество деталей каждого вида в размещениях"""
+        return dict(placements.part_counts())
+    
+    def _result(self, placements: Layout, remaining_figures: List[Figure]) -> Dict:
+        """Результат упаковки листа в общей схеме движков"""
+        used_area = placements.used_area
+        return {
+            'placements': placements,
+            'placement_groups': [],
+            'figures_count': self._count_figures(placements),
+            'used_area': used_area,
+            'efficiency': used_area / self.container.area,
+            'remaining_figures': remaining_figures
+        }
@@ -0,0 +1,242 @@
+"""
+Локальный сервер расчета раскроя: JSON построчно поверх TCP.
+
+Запуск из корня репозитория:
+    python -m service.planning_server --port 8765 --workers 4
+
+Запрос - одна строка JSON:
+    {"id": 1, "operation": "production_plan",
+     "container": {"width": 594, "height": 841, "margin": 5},
+     "figures": [{"width": 40, "height": 40, "necessary": 200, "margin": 2}],
+     "bulk": false, "strategy": "area/best_area/longer_leftover", "engine": "guillotine"}
+Ответ - одна строка JSON {"id", "ok", "result" | "error"}; ответы на запросы
+одного соединения могут приходить не в порядке запросов
+"""
+from typing import List, Dict, Tuple, Optional, Set
+from collections import Counter
+from concurrent.futures import Executor, ProcessPoolExecutor
+from entity.container import Container
+from entity.figure import Figure
+from service.guillotine_packer import PackingStrategy
+from service.engines import ENGINES
+from service.industrial_calc import IndustrialCalcService
+from service.layout_cache import LayoutCache
+from service.serialization import bool_from_value, container_from_dict, figures_from_list, strategy_from_str, to_jsonable
+import argparse
+import asyncio
+import json
+import os
+
+OPERATIONS = ('production_plan', 'cutting_plan', 'cutting_stock_plan', 'stats')
+
+class ServerOverloaded(Exception):
+    """Очередь расчетов заполнена - запрос отклонен без ожидания"""
+
+class PlanningServer:
+    """
+    Долгоживущий сервис перед IndustrialCalcService.
+    Одинаковые запросы, пришедшие во время расчета, ждут один и тот же расчет.
+    Расчеты выполняются в пуле процессов, одновременно - не больше max_workers,
+    в очереди - не больше max_pending; сверх этого запросы сразу отклоняются.
+    Истекший timeout прерывает ожидание клиента, но не расчет: его результат
+    попадает в кэш раскроев, который сохраняется между запросами
+    """
+    def __init__(self, host: str = '127.0.0.1', port: int = 8765, max_workers: Optional[int] = None,
+                 max_pending: int = 64, timeout: float = 30.0, cache: Optional[LayoutCache] = None,
+                 executor: Optional[Executor] = None, max_line: int = 16 * 1024 * 1024):
+        self.host = host
+        self.port = port
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.timeout = timeout  # Секунд ожидания ответа для одного запроса
+        self.cache = cache if cache is not None else LayoutCache(max_entries=1024)
+        self.max_line = max_line  # Предельная длина строки запроса в байтах
+        self.stats = Counter()
+        self._executor = executor
+        self._own_executor = executor is None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> asyncio.AbstractServer:
+        """Запускает пул процессов и начинает принимать соединения"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        self._slots = asyncio.Semaphore(self.max_workers)
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port, limit=self.max_line
+        )
+        return self._server
+
+    async def serve_forever(self):
+        server = self._server or await self.start()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self):
+        """Останавливает прием соединений и пул процессов"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._own_executor and self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def handle_request(self, request: Dict) -> Dict:
+        """Обрабатывает один разобранный запрос и возвращает ответ"""
+        request_id = request.get('id') if isinstance(request, dict) else None
+        self.stats['requests'] += 1
+        try:
+            if not isinstance(request, dict):
+                raise ValueError('Запрос должен быть объектом JSON')
+            operation = request.get('operation', 'production_plan')
+            if operation not in OPERATIONS:
+                raise ValueError(f"Неизвестная операция: {operation}")
+            if operation == 'stats':
+                return {'id': request_id, 'ok': True, 'result': self.server_stats()}
+
+            container = container_from_dict(request['container'])
+            figures = figures_from_list(request['figures'])
+            bulk = bool_from_value(request.get('bulk', False))
+            strategy = strategy_from_str(request.get('strategy'))
+            engine = request.get('engine', 'guillotine')
+            if engine not in ENGINES:
+                raise ValueError(f"Неизвестный движок раскроя: {engine}")
+            result, source = await self._calculate(operation, container, figures, bulk, strategy, engine)
+            return {'id': request_id, 'ok': True, 'source': source, 'result': result}
+        except (KeyError, TypeError, ValueError) as error:
+            self.stats['bad_requests'] += 1
+            return _error(request_id, 'bad_request', str(error))
+        except ServerOverloaded:
+            self.stats['rejected'] += 1
+            return _error(request_id, 'overloaded', 'Очередь расчетов заполнена, повторите позже')
+        except asyncio.TimeoutError:
+            self.stats['timeouts'] += 1
+            return _error(request_id, 'timeout', f"Расчет не завершился за {self.timeout} с")
+        except Exception as error:
+            # Любой сбой расчета должен вернуть ответ, иначе клиент ждет его бесконечно
+            self.stats['internal_errors'] += 1
+            return _error(request_id, 'internal_error', f"{type(error).__name__}: {error}")
+
+    def server_stats(self) -> Dict:
+        return {
+            **self.stats,
+            'in_flight': len(self._in_flight),
+            'cache_entries': len(self.cache),
+            'cache_hits': self.cache.hits,
+            'cache_misses': self.cache.misses
+        }
+
+    async def _calculate(self, operation: str, container: Container, figures: List[Figure],
+                         bulk: bool, strategy: PackingStrategy, engine: str) -> Tuple[Dict, str]:
+        """Возвращает результат и его источник: cache, coalesced или computed"""
+        key = LayoutCache.fingerprint(
+            container, figures, bulk=bulk, strategy=str(strategy), engine=engine, operation=operation
+        )
+        result = self.cache.get(key)
+        if result is not None:
+            return result, 'cache'
+
+        task = self._in_flight.get(key)
+        source = 'coalesced'
+        if task is None:
+            if len(self._in_flight) >= self.max_pending:
+                raise ServerOverloaded()
+            task = asyncio.ensure_future(self._compute(key, (operation, container, figures, bulk, strategy, engine)))
+            self._in_flight[key] = task
+            source = 'computed'
+        self.stats[source] += 1
+
+        # shield: таймаут одного клиента не отменяет расчет для остальных
+        return await asyncio.wait_for(asyncio.shield(task), self.timeout), source
+
+    async def _compute(self, key: str, job: Tuple) -> Dict:
+        try:
+            async with self._slots:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self._executor, _calculate, job)
+            return self.cache.put(key, result)
+        finally:
+            del self._in_flight[key]
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        write_lock = asyncio.Lock()
+        tasks: Set[asyncio.Task] = set()
+
+        async def respond(line: bytes):
+            try:
+                request = json.loads(line)
+            except ValueError as error:
+                self.stats['bad_requests'] += 1
+                response = _error(None, 'bad_request', f"Некорректный JSON: {error}")
+            else:
+                response = await self.handle_request(request)
+            async with write_lock:
+                writer.write(json.dumps(response, ensure_ascii=False).encode() + b'\n')
+                await writer.drain()
+
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Строка длиннее max_line - дальше поток не разобрать
+                    async with write_lock:
+                        writer.write(json.dumps(_error(None, 'bad_request', 'Слишком длинный запрос')).encode() + b'\n')
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                task = asyncio.ensure_future(respond(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+def _error(request_id, code: str, message: str) -> Dict:
+    return {'id': request_id, 'ok': False, 'error': {'code': code, 'message': message}}
+
+def _calculate(job: Tuple[str, Container, List[Figure], bool, PackingStrategy, str]) -> Dict:
+    """Рассчитывает план (выполняется в процессе пула) и переводит его в JSON-совместимый вид"""
+    operation, container, figures, bulk, strategy, engine = job
+    service = IndustrialCalcService(container, figures, bulk=bulk, strategy=strategy, engine=engine)
+    if operation == 'cutting_plan':
+        return to_jsonable(service.generate_cutting_plan())
+    if operation == 'cutting_stock_plan':
+        return to_jsonable(service.calculate_cutting_stock_plan())
+    return to_jsonable(service.calculate_production_plan())
+
+def main():
+    parser = argparse.ArgumentParser(description='Сервер расчета раскроя (JSON построчно поверх TCP)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None, help='процессов расчета')
+    parser.add_argument('--max-pending', type=int, default=64, help='расчетов в очереди')
+    parser.add_argument('--timeout', type=float, default=30.0, help='секунд ожидания ответа')
+    parser.add_argument('--cache-size', type=int, default=1024)
+    parser.add_argument('--cache-dir', default=None, help='каталог кэша раскроев на диске')
+    args = parser.parse_args()
+
+    server = PlanningServer(
+        args.host, args.port, max_workers=args.workers, max_pending=args.max_pending,
+        timeout=args.timeout, cache=LayoutCache(max_entries=args.cache_size, path=args.cache_dir)
+    )
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,120 @@
+from typing import List, Dict
+from collections import Counter
+from entity.container import Container, GuillotineNode
+from entity.figure import Figure
+import heapq
+import math
+
 class RatingService:
-    def __init__(self):
-        pass
\ No newline at end of file
+    """
+    Инкрементальная оценка частично упакованного раскроя.
+    Показатели обновляются за O(1) (наибольший остаток - за амортизированное O(log n))
+    на каждое размещение и разделение узла, что позволяет прерывать поиск,
+    как только раскрой уже не может превзойти лучший найденный
+    """
+    def __init__(self, container: Container, figures: List[Figure], min_offcut_side: int = 0):
+        self.container = container
+        self.min_offcut_side = min_offcut_side  # Меньшие остатки не считаются деловыми
+        self.usable_area = (container.width - 2 * container.margin) * (container.height - 2 * container.margin)
+        self.remaining_demand_area = sum(fig.area() * fig.necessary for fig in figures)
+        self.sheets_started = 0
+        self.start_sheet()
+
+    def start_sheet(self):
+        """Начинает оценку нового пустого листа"""
+        self.sheets_started += 1
+        self.used_area = 0
+        self.placed_count = 0
+        self.free_area = 0
+        self.free_count = 0
+        self.free_square_sum = 0
+        self._offcuts: List[int] = []
+        self._removed_offcuts: Counter = Counter()
+        self._add_free(self.container.width - 2 * self.container.margin,
+                       self.container.height - 2 * self.container.margin)
+
+    def on_place(self, figure: Figure, count: int = 1):
+        """Учитывает размещение count фигур"""
+        area = figure.area() * count
+        self.used_area += area
+        self.remaining_demand_area -= area
+        self.placed_count += count
+
+    def on_split(self, node: GuillotineNode):
+        """Учитывает разделение свободного узла на деталь и дочерние узлы"""
+        self._remove_free(node.width, node.height)
+        if node.right:
+            self._add_free(node.right.width, node.right.height)
+        if node.down:
+            self._add_free(node.down.width, node.down.height)
+
+    @property
+    def efficiency(self) -> float:
+        return self.used_area / self.container.area
+
+    @property
+    def largest_offcut(self) -> int:
+        """Площадь наибольшего делового остатка"""
+        offcuts = self._offcuts
+        while offcuts and self._removed_offcuts[-offcuts[0]]:
+            self._removed_offcuts[-heapq.heappop(offcuts)] -= 1
+        return -offcuts[0] if offcuts else 0
+
+    @property
+    def fragmentation(self) -> float:
+        """Раздробленность свободного места: 0 - один прямоугольник, ближе к 1 - много мелких"""
+        if self.free_area == 0:
+            return 0.0
+        return 1 - self.free_square_sum / (self.free_area * self.free_area)
+
+    @property
+    def sheets_lower_bound(self) -> int:
+        """Нижняя граница числа листов, которые понадобятся после текущего"""
+        overflow = self.remaining_demand_area - self.free_area
+        if overflow <= 0 or self.usable_area <= 0:
+            return 0
+        return math.ceil(overflow / self.usable_area)
+
+    @property
+    def efficiency_upper_bound(self) -> float:
+        """Эффективность, которой лист может достичь в лучшем случае"""
+        return (self.used_area + min(self.free_area, max(self.remaining_demand_area, 0))) / self.container.area
+
+    def can_beat(self, best_efficiency: float) -> bool:
+        """Может ли текущий лист превзойти лучшую найденную эффективность"""
+        return self.efficiency_upper_bound > best_efficiency
+
+    def score(self) -> Dict:
+        return {
+            'used_area': self.used_area,
+            'efficiency': self.efficiency,
+            'largest_offcut': self.largest_offcut,
+            'fragmentation': self.fragmentation,
+            'free_rectangles': self.free_count,
+            'sheets_lower_bound': self.sheets_lower_bound,
+            'efficiency_upper_bound': self.efficiency_upper_bound
+        }
+
+    def copy(self) -> 'RatingService':
+        """Копия оценки для ответвления частично упакованного листа"""
+        rating = RatingService.__new__(RatingService)
+        rating.__dict__.update(self.__dict__)
+        rating._offcuts = list(self._offcuts)
+        rating._removed_offcuts = Counter(self._removed_offcuts)
+        return rating
+
+    def _add_free(self, width: int, height: int):
+        area = width * height
+        self.free_area += area
+        self.free_count += 1
+        self.free_square_sum += area * area
+        if min(width, height) >= self.min_offcut_side:
+            heapq.heappush(self._offcuts, -area)
+
+    def _remove_free(self, width: int, height: int):
+        area = width * height
+        self.free_area -= area
+        self.free_count -= 1
+        self.free_square_sum -= area * area
+        if min(width, height) >= self.min_offcut_side:
+            self._removed_offcuts[area] += 1
@@ -0,0 +1,141 @@
+from typing import List, Dict, Optional, Iterable
+from collections import Counter
+from dataclasses import dataclass, field
+from entity.container import Container
+from entity.figure import Figure
+from entity.packing_session import PackingSession
+from entity.part_type import PartType
+from service.guillotine_packer import GuillotinePacker, PackingStrategy
+
+@dataclass
+class PlannedSheet:
+    """Лист плана: сессия упаковки и количество деталей каждого вида на нем"""
+    session: PackingSession
+    counts: Counter = field(default_factory=Counter)
+    frozen: bool = False  # Лист уже раскроен или зафиксирован, менять его нельзя
+
+class ReplanningService:
+    """
+    Многолистовой план с инкрементальным пересчетом при изменении заказа.
+    Листы, на которых нет лишних после изменения деталей, сохраняются как есть,
+    недостающие детали дозаполняют свободное место сохраненных листов и
+    только затем упаковываются на новые листы. Замороженные листы не меняются никогда
+    """
+    def __init__(self, container: Container, figures: List[Figure], bulk: bool = False,
+                 strategy: Optional[PackingStrategy] = None):
+        self.container = container
+        self.bulk = bulk
+        self.strategy = strategy or PackingStrategy()
+        self.demand: Dict[PartType, Figure] = {}
+        for figure in figures:
+            self._add_demand(figure)
+        self.sheets: List[PlannedSheet] = []
+        self.unplaced: List[Figure] = []
+
+    def calculate_plan(self) -> Dict:
+        """Рассчитывает план заново, лист за листом"""
+        self.sheets = []
+        self.unplaced = self._pack_new_sheets(list(self.demand.values()))
+        return self._plan(reused=0, refilled=0)
+
+    def freeze(self, sheet_index: int):
+        """Фиксирует лист плана (например, уже отправленный на раскрой)"""
+        self.sheets[sheet_index].frozen = True
+
+    def replan(self, added: Iterable[Figure] = (), removed: Iterable[Figure] = (),
+               changed: Iterable[Figure] = ()) -> Dict:
+        """
+        Пересчитывает план после изменения заказа.
+        added - новые детали (для уже заказанного вида количество добавляется),
+        removed - детали, исключаемые из заказа, changed - детали с новым necessary.
+        Вид детали (PartType) определяется размерами, возможностью поворота и отступом
+        """
+        for figure in added:
+            self._add_demand(figure)
+        for figure in removed:
+            self.demand.pop(PartType.of(figure), None)
+        for figure in changed:
+            part_type = PartType.of(figure)
+            if part_type not in self.demand:
+                raise ValueError(f"Деталь {figure} отсутствует в заказе")
+            self.demand[part_type] = part_type.figure(figure.necessary)
+
+        # Сохраняем листы, все детали которых еще нужны; замороженные - безусловно
+        remaining = Counter({part_type: figure.necessary for part_type, figure in self.demand.items()})
+        kept = set()
+        for sheet in sorted(self.sheets, key=lambda sheet: not sheet.frozen):
+            if sheet.frozen or all(remaining[part_type] >= count for part_type, count in sheet.counts.items()):
+                remaining.subtract(sheet.counts)
+                kept.add(id(sheet))
+        self.sheets = [sheet for sheet in self.sheets if id(sheet) in kept]
+        reused = len(self.sheets)
+
+        # Недостающие детали - сначала в свободное место сохраненных листов
+        leftover = [part_type.figure(count) for part_type, count in remaining.items() if count > 0]
+        refilled = 0
+        for sheet in self.sheets:
+            if not leftover:
+                break
+            if sheet.frozen or not self._may_fit(sheet.session, leftover):
+                continue
+            placed_before = len(sheet.session.placements)
+            result = self._packer(leftover).pack_single_container(leftover, sheet.session)
+            if len(sheet.session.placements) > placed_before:
+                refilled += 1
+                sheet.counts = sheet.session.placements.part_counts()
+            leftover = result['remaining_figures']
+
+        # Остальное - на новые листы
+        self.unplaced = self._pack_new_sheets(leftover)
+        return self._plan(reused=reused, refilled=refilled)
+
+    def _pack_new_sheets(self, figures: List[Figure]) -> List[Figure]:
+        """Упаковывает фигуры на новые листы и возвращает не поместившиеся"""
+        if not figures:
+            return []
+        packer = self._packer(figures)
+        remaining = figures
+        for result in packer.iter_containers():
+            self.sheets.append(PlannedSheet(packer.session, packer.session.placements.part_counts()))
+            remaining = result['remaining_figures']
+        return remaining
+
+    def _plan(self, reused: int, refilled: int) -> Dict:
+        sheets = []
+        total_used_area = 0
+        for sheet_index, sheet in enumerate(self.sheets):
+            placements = sheet.session.placements
+            used_area = placements.used_area
+            total_used_area += used_area
+            sheets.append({
+                'sheet_index': sheet_index,
+                'placements': placements,
+                'figures_count': dict(sheet.counts),
+                'used_area': used_area,
+                'efficiency': used_area / self.container.area,
+                'frozen': sheet.frozen
+            })
+
+        total_material_area = self.container.area * len(sheets)
+        return {
+            'sheets': sheets,
+            'sheets_required': len(sheets),
+            'efficiency': total_used_area / total_material_area if total_material_area > 0 else 0,
+            'waste_area': total_material_area - total_used_area,
+            'remaining_figures': list(self.unplaced),
+            'reused_sheets': reused,  # Листов сохранено из предыдущего плана
+            'refilled_sheets': refilled  # Из них дозаполнено недостающими деталями
+        }
+
+    def _may_fit(self, session: PackingSession, figures: List[Figure]) -> bool:
+        """Быстрая проверка: есть ли свободный узел не меньше самой маленькой детали"""
+        largest = session.free_index.largest()
+        return largest is not None and largest.width * largest.height >= min(figure.area() for figure in figures)
+
+    def _add_demand(self, figure: Figure):
+        part_type = PartType.of(figure)
+        current = self.demand.get(part_type)
+        self.demand[part_type] = part_type.figure(figure.necessary + (current.necessary if current else 0))
+
+    def _packer(self, figures: List[Figure]) -> GuillotinePacker:
+        return GuillotinePacker(self.container, figures, bulk=self.bulk, strategy=self.strategy)
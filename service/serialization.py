@@ -0,0 +1,140 @@
+from typing import List, Dict, Any, Optional, Iterable, Iterator
+from dataclasses import fields
+from entity.container import Container
+from entity.figure import Figure
+from entity.layout import Layout
+from entity.part_type import PartType
+from service.guillotine_packer import PackingStrategy, SORT_KEYS, FIT_RULES, SPLIT_RULES
+import csv
+import math
+
+# Колонки CSV: строка - одна фигура заказа, подряд идущие строки с одним id - один заказ
+CSV_COLUMNS = ('id', 'sheet_width', 'sheet_height', 'sheet_margin', 'width', 'height', 'necessary', 'rotation', 'margin')
+
+def container_from_dict(data: Dict) -> Container:
+    """Лист из словаря {'width', 'height', 'margin'}"""
+    container = Container(int(data['width']), int(data['height']), int(data.get('margin', 0)))
+    if container.width <= 0 or container.height <= 0:
+        raise ValueError(f"Размеры листа должны быть положительными: {container.width}x{container.height}")
+    if container.margin < 0:
+        raise ValueError(f"Отступ листа не может быть отрицательным: {container.margin}")
+    if container.width - 2 * container.margin <= 0 or container.height - 2 * container.margin <= 0:
+        raise ValueError(f"Отступ {container.margin} не оставляет на листе полезной площади")
+    return container
+
+def figure_from_dict(data: Dict) -> Figure:
+    """Фигура из словаря {'width', 'height', 'necessary', 'rotation', 'margin'}"""
+    figure = Figure(
+        int(data['width']), int(data['height']), int(data['necessary']),
+        bool_from_value(data.get('rotation', True)), int(data.get('margin', 0))
+    )
+    if figure.width <= 0 or figure.height <= 0:
+        raise ValueError(f"Размеры фигуры должны быть положительными: {figure.width}x{figure.height}")
+    if figure.necessary < 0:
+        raise ValueError(f"Потребность не может быть отрицательной: {figure.necessary}")
+    if figure.margin < 0:
+        raise ValueError(f"Отступ фигуры не может быть отрицательным: {figure.margin}")
+    return figure
+
+def bool_from_value(value: Any) -> bool:
+    """Логическое значение из JSON или CSV: true/false, 1/0, yes/no (строка "false" - ложь)"""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in ('1', 'true', 'yes'):
+            return True
+        if text in ('0', 'false', 'no'):
+            return False
+    raise ValueError(f"Ожидалось логическое значение: {value!r}")
+
+def figures_from_list(data: List[Dict]) -> List[Figure]:
+    if not isinstance(data, list):
+        raise ValueError('figures должен быть списком')
+    return [figure_from_dict(item) for item in data]
+
+def strategy_from_str(value: Optional[str]) -> PackingStrategy:
+    """Стратегия из строки 'sort_key/fit_rule/split_rule' (формат PackingStrategy.__str__)"""
+    if not value:
+        return PackingStrategy()
+    parts = value.split('/')
+    if len(parts) != 3:
+        raise ValueError(f"Стратегия должна иметь вид sort_key/fit_rule/split_rule: {value}")
+    sort_key, fit_rule, split_rule = parts
+    if sort_key not in SORT_KEYS or fit_rule not in FIT_RULES or split_rule not in SPLIT_RULES:
+        raise ValueError(f"Неизвестная стратегия: {value}")
+    return PackingStrategy(sort_key, fit_rule, split_rule)
+
+def to_jsonable(value: Any) -> Any:
+    """
+    Переводит результат расчета в структуры, пригодные для JSON:
+    фигуры и листы - в словари, раскрой - в список размещений,
+    бесконечность (фигура не помещается) - в None.
+    Словари по видам деталей становятся списками объектов вида
+    (part_type_jsonable) с полями значения или полем count
+    """
+    if isinstance(value, dict):
+        if value and all(isinstance(key, PartType) for key in value):
+            return [
+                {**part_type_jsonable(key), **(to_jsonable(item) if isinstance(item, dict) else {'count': to_jsonable(item)})}
+                for key, item in value.items()
+            ]
+        return {str(key): to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, PartType):
+        return part_type_jsonable(value)
+    if isinstance(value, (list, tuple, Layout)):
+        return [to_jsonable(item) for item in value]
+    if isinstance(value, PackingStrategy):
+        return str(value)
+    if isinstance(value, (Figure, Container)):
+        return {field.name: getattr(value, field.name) for field in fields(value)}
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+def part_type_jsonable(part_type: PartType) -> Dict:
+    """
+    Вид детали для JSON: "WxH" в поле figure и параметры вида.
+    part_type_id согласован в пределах одного ответа (id видов зависят от процесса)
+    """
+    return {
+        'figure': f"{part_type.width}x{part_type.height}",
+        'part_type_id': part_type.id,
+        'width': part_type.width,
+        'height': part_type.height,
+        'margin': part_type.margin,
+        'rotation': part_type.rotation
+    }
+
+def orders_from_csv(lines: Iterable[str]) -> Iterator[Dict]:
+    """
+    Читает заказы из CSV с заголовком CSV_COLUMNS и выдает их в том же виде,
+    что и заказы JSON: {'id', 'container', 'figures'}. Заказ выдается, как только
+    начинается следующий, поэтому поток читается без накопления
+    """
+    order = None
+    for row in csv.DictReader(lines):
+        order_id = row.get('id')
+        if order is None or order_id != order['id']:
+            if order is not None:
+                yield order
+            order = {
+                'id': order_id,
+                'container': {
+                    'width': row.get('sheet_width'),
+                    'height': row.get('sheet_height'),
+                    'margin': row.get('sheet_margin') or 0
+                },
+                'figures': []
+            }
+        order['figures'].append({
+            'width': row.get('width'),
+            'height': row.get('height'),
+            'necessary': row.get('necessary'),
+            'rotation': row.get('rotation') or 'true',
+            'margin': row.get('margin') or 0
+        })
+    if order is not None:
+        yield order
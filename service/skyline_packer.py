@@ -0,0 +1,110 @@
+from typing import List, Dict, Tuple, Optional
+from entity.figure import Figure
+from entity.layout import Layout
+from service.packer import Packer
+
+class SkylinePacker(Packer):
+    """
+    Упаковка по линии горизонта: занятая часть листа описывается ломаной
+    из горизонтальных отрезков (x, y, ширина), деталь ставится на самую
+    низкую, затем самую левую позицию. Пустоты под линией не используются,
+    зато поиск позиции линеен по числу отрезков и упаковка очень быстрая.
+    Раскрой в общем случае не гильотинный
+    """
+    STRATEGY_FIELDS = ('sort_key',)
+
+    def _pack_sorted(self, sorted_figures: List[Figure]) -> Dict:
+        margin = self.container.margin
+        self.width = self.container.width - 2 * margin
+        self.height = self.container.height - 2 * margin
+        # Отрезки линии горизонта [x, y, ширина] слева направо, координаты без учета отступов
+        self.skyline: List[List[int]] = [[0, 0, self.width]] if self.width > 0 and self.height > 0 else []
+        placements = Layout()
+        remaining_figures = []
+
+        for figure in sorted_figures:
+            placed_count = 0
+            rotated_figure = figure.rotated() if figure.rotation else None
+            while placed_count < figure.necessary:
+                placement = self._find_position(figure, rotated_figure)
+                if placement is None:
+                    # Линия горизонта только поднимается - фигура этого типа больше не поместится
+                    break
+                placed_figure, index, x, y = placement
+                fig_width, fig_height = placed_figure.size_with_margin()
+                placements.add(placed_figure, margin + x, margin + y, placed_figure is rotated_figure)
+                self._add_segment(index, x, y + fig_height, fig_width)
+                placed_count += 1
+
+            if placed_count < figure.necessary:
+                remaining_figures.append(Figure(
+                    figure.width, figure.height,
+                    figure.necessary - placed_count,
+                    figure.rotation, figure.margin
+                ))
+
+        return self._result(placements, remaining_figures)
+
+    def _record_gauges(self):
+        self.metrics.gauge('skyline_segments', len(self.skyline))
+
+    def _find_position(self, figure: Figure,
+                       rotated_figure: Optional[Figure]) -> Optional[Tuple[Figure, int, int, int]]:
+        """Самая низкая по верхнему краю, затем самая левая позиция среди обеих ориентаций"""
+        if self.metrics is not None:
+            self.metrics.increment('fit_searches')
+            self.metrics.increment('nodes_visited', len(self.skyline))
+        best = None
+        best_score = None
+        for candidate in (figure, rotated_figure):
+            if candidate is None:
+                continue
+            fig_width, fig_height = candidate.size_with_margin()
+            for index, (x, segment_y, _) in enumerate(self.skyline):
+                if x + fig_width > self.width:
+                    break
+                # Деталь ляжет не ниже отрезка: оценка не меньше (segment_y + высота, x),
+                # и если эта нижняя граница не лучше найденной, позицию не проверяем
+                if best_score is not None and (segment_y + fig_height, x) >= best_score:
+                    continue
+                y = self._resting_height(index, fig_width)
+                if y + fig_height > self.height:
+                    continue
+                score = (y + fig_height, x)
+                if best_score is None or score < best_score:
+                    best_score = score
+                    best = (candidate, index, x, y)
+        return best
+
+    def _resting_height(self, index: int, width: int) -> int:
+        """Высота, на которую ляжет деталь ширины width, начиная с отрезка index"""
+        skyline = self.skyline
+        end = skyline[index][0] + width
+        y = 0
+        while index < len(skyline) and skyline[index][0] < end:
+            y = max(y, skyline[index][1])
+            index += 1
+        return y
+
+    def _add_segment(self, index: int, x: int, y: int, width: int):
+        """Поднимает линию горизонта над деталью и объединяет соседние отрезки одной высоты"""
+        skyline = self.skyline
+        end = x + width
+        skyline.insert(index, [x, y, width])
+
+        # Отрезки под деталью удаляем, частично перекрытый - укорачиваем
+        next_index = index + 1
+        while next_index < len(skyline) and skyline[next_index][0] < end:
+            segment = skyline[next_index]
+            segment_end = segment[0] + segment[2]
+            if segment_end <= end:
+                del skyline[next_index]
+                continue
+            segment[2] = segment_end - end
+            segment[0] = end
+            break
+
+        for merge_index in (index, index - 1):
+            if 0 <= merge_index < len(skyline) - 1 and skyline[merge_index][1] == skyline[merge_index + 1][1]:
+                skyline[merge_index][2] += skyline[merge_index + 1][2]
+                del skyline[merge_index + 1]
@@ -0,0 +1,183 @@
+from typing import List, Dict, Tuple, Optional
+from entity.figure import Figure
+from entity.part_type import PartType, merge_figures
+from entity.stock_sheet import StockSheet
+from service.engines import create_packer
+from service.layout_cache import LayoutCache
+from service.packer import PackingStrategy
+
+class StockSelectionService:
+    """
+    Выбор листов со склада с несколькими размерами и стоимостями.
+    Лучевой поиск строит последовательность листов: на каждом шаге каждое
+    состояние продолжается каждым доступным размером листа, а состояния
+    сравниваются по стоимости плюс нижней оценке стоимости оставшегося заказа.
+    Раскрой одного листа кэшируется по размеру листа и остатку заказа, в котором
+    потребность каждого вида ограничена числом его деталей, помещающихся на лист
+    по площади: больше движок не разместит, поэтому ветви, различающиеся только
+    избытком крупных заказов, используют один раскрой
+    """
+    def __init__(self, stock: List[StockSheet], figures: List[Figure], bulk: bool = False,
+                 strategy: Optional[PackingStrategy] = None, engine: str = 'guillotine',
+                 cache: Optional[LayoutCache] = None, beam_width: int = 3):
+        self.stock = stock
+        self.figures = figures
+        self.bulk = bulk
+        self.strategy = strategy or PackingStrategy()
+        self.engine = engine
+        self.cache = cache if cache is not None else LayoutCache(max_entries=4096)
+        self.beam_width = beam_width
+        self.layouts_computed = 0
+        self.layouts_reused = 0
+
+    def calculate_stock_plan(self) -> Dict:
+        """Выбирает листы склада для заказа с минимальной общей стоимостью"""
+        demand, unplaceable = self._split_unplaceable(
+            [figure for figure in merge_figures(self.figures) if figure.necessary > 0]
+        )
+        no_usage = tuple(0 for _ in self.stock)
+        # Состояние: (оценка, стоимость, остаток заказа, израсходовано листов, выбранные листы)
+        beam = [(self._estimate(demand, no_usage), 0.0, demand, no_usage, [])]
+        best = None
+
+        while beam:
+            candidates = {}
+            for _, cost, remaining, usage, sheets in beam:
+                for stock_index, stock_sheet in enumerate(self.stock):
+                    if stock_sheet.quantity is not None and usage[stock_index] >= stock_sheet.quantity:
+                        continue
+                    layout = self._sheet_layout(stock_index, remaining)
+                    if not layout['placements']:
+                        continue
+
+                    next_cost = cost + stock_sheet.unit_cost
+                    next_remaining = layout['remaining_figures']
+                    next_usage = usage[:stock_index] + (usage[stock_index] + 1,) + usage[stock_index + 1:]
+                    next_sheets = sheets + [(stock_index, layout)]
+                    if not next_remaining:
+                        if best is None or next_cost < best[0]:
+                            best = (next_cost, next_sheets, [])
+                        continue
+
+                    # Одинаковые остаток и расход склада - оставляем более дешевое состояние
+                    key = (_demand_key(next_remaining), next_usage)
+                    if key not in candidates or next_cost < candidates[key][1]:
+                        candidates[key] = (
+                            next_cost + self._estimate(next_remaining, next_usage),
+                            next_cost, next_remaining, next_usage, next_sheets
+                        )
+
+            if best is None and not candidates:
+                # Склада не хватает: частичный план из состояния с наименьшим остатком заказа
+                _, cost, remaining, _, sheets = min(
+                    beam, key=lambda state: (_demand_area(state[2]), state[1])
+                )
+                best = (cost, sheets, remaining)
+
+            # Состояния, которые уже не могут быть дешевле найденного плана, отбрасываем
+            beam = sorted(
+                (state for state in candidates.values() if best is None or state[0] < best[0]),
+                key=lambda state: (state[0], state[1])
+            )[:self.beam_width]
+
+        total_cost, sheets, remaining = best
+        return self._plan(total_cost, sheets, remaining + unplaceable)
+
+    def _sheet_layout(self, stock_index: int, figures: List[Figure]) -> Dict:
+        """
+        Раскрой одного листа размера stock_index для остатка заказа.
+        Остаток после листа считается от фактической потребности, а не от ограниченной
+        """
+        stock_sheet = self.stock[stock_index]
+        container = stock_sheet.container
+        capacity = _usable_area(stock_sheet)
+        capped = [
+            PartType.of(fig).figure(min(fig.necessary, capacity // fig.area()))
+            for fig in figures
+        ]
+        key = LayoutCache.fingerprint(
+            container, capped, bulk=self.bulk, strategy=str(self.strategy),
+            engine=f'single_sheet/{self.engine}'
+        )
+        layout = self.cache.get(key)
+        if layout is not None:
+            self.layouts_reused += 1
+        else:
+            self.layouts_computed += 1
+            packer = create_packer(self.engine, container, capped, bulk=self.bulk, strategy=self.strategy)
+            layout = self.cache.put(key, packer.pack_single_container())
+
+        figures_count = layout['figures_count']
+        remaining = [
+            PartType.of(fig).figure(fig.necessary - figures_count.get(PartType.of(fig), 0))
+            for fig in figures
+        ]
+        return {**layout, 'remaining_figures': [fig for fig in remaining if fig.necessary > 0]}
+
+    def _estimate(self, figures: List[Figure], usage: Tuple[int, ...]) -> float:
+        """Нижняя оценка стоимости: площадь остатка по самой низкой цене единицы полезной площади"""
+        remaining_area = _demand_area(figures)
+        if remaining_area == 0:
+            return 0.0
+        prices = [
+            stock_sheet.unit_cost / _usable_area(stock_sheet)
+            for stock_sheet, used in zip(self.stock, usage)
+            if (stock_sheet.quantity is None or used < stock_sheet.quantity) and _usable_area(stock_sheet) > 0
+        ]
+        return remaining_area * min(prices) if prices else float('inf')
+
+    def _split_unplaceable(self, figures: List[Figure]) -> Tuple[List[Figure], List[Figure]]:
+        """Отделяет фигуры, которые не помещаются ни на один лист склада"""
+        placeable, unplaceable = [], []
+        for figure in figures:
+            fig_width, fig_height = figure.size_with_margin()
+            fits = False
+            for stock_sheet in self.stock:
+                container = stock_sheet.container
+                width = container.width - 2 * container.margin
+                height = container.height - 2 * container.margin
+                if fig_width <= width and fig_height <= height or \
+                        figure.rotation and fig_height <= width and fig_width <= height:
+                    fits = True
+                    break
+            (placeable if fits else unplaceable).append(figure)
+        return placeable, unplaceable
+
+    def _plan(self, total_cost: float, sheets: List[Tuple[int, Dict]], remaining: List[Figure]) -> Dict:
+        stock_usage = [0] * len(self.stock)
+        total_material_area = 0
+        total_used_area = 0
+        plan_sheets = []
+        for stock_index, layout in sheets:
+            stock_sheet = self.stock[stock_index]
+            stock_usage[stock_index] += 1
+            total_material_area += stock_sheet.container.area
+            total_used_area += layout['used_area']
+            plan_sheets.append({
+                'stock_index': stock_index,
+                'stock': stock_sheet,
+                'unit_cost': stock_sheet.unit_cost,
+                'layout': layout
+            })
+
+        return {
+            'sheets': plan_sheets,
+            'sheets_required': len(plan_sheets),
+            'stock_usage': stock_usage,  # Сколько листов каждой позиции склада израсходовано
+            'total_cost': total_cost,
+            'efficiency': total_used_area / total_material_area if total_material_area > 0 else 0,
+            'waste_area': total_material_area - total_used_area,
+            'remaining_figures': remaining,
+            'layouts_computed': self.layouts_computed,
+            'layouts_reused': self.layouts_reused
+        }
+
+def _usable_area(stock_sheet: StockSheet) -> int:
+    container = stock_sheet.container
+    return max(0, container.width - 2 * container.margin) * max(0, container.height - 2 * container.margin)
+
+def _demand_area(figures: List[Figure]) -> int:
+    return sum(fig.area() * fig.necessary for fig in figures)
+
+def _demand_key(figures: List[Figure]) -> Tuple:
+    return tuple(sorted((PartType.of(fig).id, fig.necessary) for fig in figures))
@@ -0,0 +1,23 @@
+from entity.container import Container
+from entity.figure import Figure
+from service.anytime import AnytimeOptimizer
+
+def _figures():
+    return [
+        Figure(170, 90, 6), Figure(60, 45, 25, True, 2), Figure(220, 130, 3),
+        Figure(35, 35, 40), Figure(120, 80, 8, False)
+    ]
+
+def test_zero_temperature_never_accepts_worse_neighbour():
+    # При нулевой температуре порог приема равен эффективности текущего раскроя
+    optimizer = AnytimeOptimizer(Container(600, 400, 5), _figures(), seed=7, initial_temperature=0.0)
+    efficiency = optimizer.current['efficiency']
+    for _ in range(300):
+        list(optimizer.improve(max_iterations=1))
+        assert optimizer.current['efficiency'] >= efficiency
+        efficiency = optimizer.current['efficiency']
+
+def test_best_is_not_worse_than_greedy():
+    optimizer = AnytimeOptimizer(Container(600, 400, 5), _figures(), seed=3)
+    greedy = optimizer.best['efficiency']
+    assert optimizer.run(max_iterations=200)['efficiency'] >= greedy
@@ -0,0 +1,100 @@
+from functools import lru_cache
+import itertools
+import random
+import time
+from entity.container import Container
+from entity.figure import Figure
+from entity.part_type import PartType
+from service.knapsack import GuillotineKnapsackService
+
+def _brute_force(width, height, figures, bounded):
+    """Точный гильотинный рюкзак перебором всех разрезов и распределений спроса"""
+    pieces = []
+    for index, figure in enumerate(figures):
+        pieces.append((figure.width, figure.height, index))
+        if figure.rotation and figure.width != figure.height:
+            pieces.append((figure.height, figure.width, index))
+
+    @lru_cache(maxsize=None)
+    def best(w, h, demand):
+        value = max(
+            [piece_w * piece_h for piece_w, piece_h, index in pieces
+             if piece_w <= w and piece_h <= h and (not bounded or demand[index] > 0)] + [0]
+        )
+        splits = itertools.product(*[range(count + 1) for count in demand]) if bounded else [demand]
+        for split in splits:
+            rest = tuple(count - part for count, part in zip(demand, split)) if bounded else demand
+            for x in range(1, w // 2 + 1):
+                value = max(value, best(x, h, split) + best(w - x, h, rest))
+            for y in range(1, h // 2 + 1):
+                value = max(value, best(w, y, split) + best(w, h - y, rest))
+        return value
+
+    return best(width, height, tuple(figure.necessary for figure in figures))
+
+def _assert_valid_layout(result, width, height):
+    """Детали внутри листа и не пересекаются"""
+    boxes = []
+    for placement in result['placements']:
+        box_width, box_height = placement['figure'].size_with_margin()
+        boxes.append((placement['x'], placement['y'], box_width, box_height))
+    for x, y, box_width, box_height in boxes:
+        assert 0 <= x and 0 <= y and x + box_width <= width and y + box_height <= height
+    for (x1, y1, w1, h1), (x2, y2, w2, h2) in itertools.combinations(boxes, 2):
+        assert x1 + w1 <= x2 or x2 + w2 <= x1 or y1 + h1 <= y2 or y2 + h2 <= y1
+
+def _random_case(rng, max_side, max_piece, max_demand):
+    width, height = rng.randint(4, max_side), rng.randint(4, max_side)
+    figures = [
+        Figure(rng.randint(1, max_piece), rng.randint(1, max_piece), rng.randint(1, max_demand), rng.random() < 0.5)
+        for _ in range(rng.randint(1, 3))
+    ]
+    return width, height, figures
+
+def test_bounded_places_small_and_large_part():
+    result = GuillotineKnapsackService(Container(100, 100), [Figure(10, 10, 1), Figure(90, 90, 1)]).solve()
+    assert result['used_area'] == 8200
+    assert result['remaining_figures'] == []
+    assert result['proven_optimal']
+
+def test_unconstrained_matches_brute_force():
+    rng = random.Random(11)
+    for _ in range(40):
+        width, height, figures = _random_case(rng, 20, 9, 1)
+        result = GuillotineKnapsackService(Container(width, height), figures, bounded=False).solve()
+        assert result['used_area'] == _brute_force(width, height, figures, bounded=False)
+        assert result['proven_optimal']
+
+def test_bounded_respects_demand_and_brute_force_bound():
+    rng = random.Random(5)
+    matches = 0
+    for _ in range(30):
+        width, height, figures = _random_case(rng, 9, 5, 3)
+        result = GuillotineKnapsackService(Container(width, height), figures).solve()
+        optimum = _brute_force(width, height, figures, bounded=True)
+        _assert_valid_layout(result, width, height)
+
+        demand = {}
+        for figure in figures:
+            demand[PartType.of(figure)] = demand.get(PartType.of(figure), 0) + figure.necessary
+        for part_type, count in result['figures_count'].items():
+            assert count <= demand[part_type]
+        assert result['used_area'] <= optimum
+        if result['proven_optimal']:
+            assert result['used_area'] == optimum
+        matches += result['used_area'] == optimum
+    # Ограничение спроса решается эвристически, но почти всегда оптимально на малых задачах
+    assert matches >= 25
+
+def test_bounded_a1_sheet_is_fast():
+    # Лист A1 в миллиметрах, спрос почти на весь лист: раскрой идет через таблицу,
+    # а не через жадную упаковку. Раньше такие задачи решались десятки секунд
+    figures = [Figure(37, 53, 30), Figure(41, 29, 30), Figure(113, 71, 30), Figure(61, 47, 30), Figure(23, 97, 30)]
+    started = time.perf_counter()
+    result = GuillotineKnapsackService(Container(594, 841), figures).solve()
+    assert time.perf_counter() - started < 3.0
+    _assert_valid_layout(result, 594, 841)
+    for part_type, count in result['figures_count'].items():
+        assert count <= 30
+    assert result['used_area'] >= 0.99 * result['upper_bound_area']
+